@@ -0,0 +1,245 @@
+"""
+Throughput benchmark for the fetch -> transform -> write paths.
+
+Starts local mock Tuya, Edenic and InfluxDB servers and drives the real
+clients against them at increasing fleet sizes. Each (stage, fleet size) case
+runs in a fresh interpreter so peak RSS is not polluted by earlier cases.
+
+    python bench/bench_pipeline.py --sizes 1,10,100,1000,10000
+    python bench/bench_pipeline.py --json bench_output.json
+    python bench/bench_pipeline.py --baseline bench_output.json --tolerance 0.2
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from mock_servers import (MOCK_API_KEY, MOCK_CLIENT_ID, MOCK_SECRET, EdenicMockServer,
+                          InfluxMockServer, TuyaMockServer, device_ids)
+
+STAGES = ['tuya-csv', 'tuya-influx', 'edenic-csv']
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _configure_env(urls, workdir):
+    # Set everything explicitly so load_dotenv() never picks up real credentials
+    os.environ.update({
+        'TUYA_ACCESS_ID': MOCK_CLIENT_ID,
+        'TUYA_ACCESS_SECRET': MOCK_SECRET,
+        'TUYA_BASE_URL': urls['tuya'],
+        'TUYA_DEVICE_ID': device_ids(1)[0],
+        'CSV_FILE': os.path.join(workdir, 'device.csv'),
+        'INFLUXDB_URL': urls['influx'],
+        'INFLUXDB_TOKEN': 'benchtoken',
+        'INFLUXDB_ORG': 'bench',
+        'INFLUXDB_BUCKET': 'bench',
+        'API_KEY': MOCK_API_KEY,
+        'API_URL': f"{urls['edenic']}/api/v1/telemetry/{device_ids(1)[0]}",
+    })
+
+
+def _stage_tuya_csv(devices, urls):
+    from tuya import tuya_csv
+    api = tuya_csv.TuyaCloudAPI()
+
+    def step(device_id):
+        result = api.get_device_status(device_id)
+        if not result.get('success'):
+            raise RuntimeError(f"Tuya status failed: {result.get('msg')}")
+    return step, None
+
+
+def _stage_tuya_influx(devices, urls):
+    from influxdb_client import Point
+    from influxdb_client.client.write_api import SYNCHRONOUS
+    from tuya import tuya_influx
+
+    logger = tuya_influx.TuyaTemperatureLogger()
+    logger.base_url = urls['tuya']  # the logger only derives its URL from REGION
+    write_api = logger.influx_client.write_api(write_options=SYNCHRONOUS)
+    points = []
+
+    def step(device_id):
+        logger.device_id = device_id
+        temperature = logger.get_temperature_data()
+        if temperature is None:
+            raise RuntimeError("Tuya status returned no temperature")
+        points.append(Point("tuya_5in1").tag("device_id", device_id).field("temperature", temperature))
+
+    def finish():
+        write_api.write(bucket=logger.influx_bucket, org=logger.influx_org, record=points)
+        logger.influx_client.close()
+    return step, finish
+
+
+def _stage_edenic_csv(devices, urls):
+    import pull_csv
+
+    def step(device_id):
+        pull_csv.API_URL = f"{urls['edenic']}/api/v1/telemetry/{device_id}"
+        data = pull_csv.fetch_telemetry()
+        if not data:
+            raise RuntimeError("Edenic telemetry fetch failed")
+        pull_csv.transform_and_export_csv(data)
+    return step, None
+
+
+STAGE_RUNNERS = {
+    'tuya-csv': _stage_tuya_csv,
+    'tuya-influx': _stage_tuya_influx,
+    'edenic-csv': _stage_edenic_csv,
+}
+
+
+def _run_case(stage, size, urls, queue):
+    """Worker body: runs one (stage, size) case in a fresh interpreter"""
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)  # transform_and_export_csv writes to the cwd
+            _configure_env(urls, workdir)
+            devices = device_ids(size)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                step, finish = STAGE_RUNNERS[stage](devices, urls)
+                latencies = []
+                start = time.perf_counter()
+                for device_id in devices:
+                    t0 = time.perf_counter()
+                    step(device_id)
+                    latencies.append(time.perf_counter() - t0)
+                if finish:
+                    finish()
+                elapsed = time.perf_counter() - start
+        latencies.sort()
+        queue.put({
+            'elapsed': elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        })
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def run_case(ctx, servers, stage, size):
+    urls = {name: server.url for name, server in servers.items()}
+    before = {name: server.requests_served for name, server in servers.items()}
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(stage, size, urls, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+
+    result.update({'stage': stage, 'devices': size})
+    if 'error' not in result:
+        requests = sum(server.requests_served - before[name] for name, server in servers.items())
+        result['requests'] = requests
+        result['requests_per_s'] = requests / result['elapsed'] if result['elapsed'] else 0.0
+        result['devices_per_s'] = size / result['elapsed'] if result['elapsed'] else 0.0
+    return result
+
+
+def find_regressions(results, baseline, tolerance):
+    """Compare against a previous --json output; returns human-readable failures"""
+    previous = {(r['stage'], r['devices']): r for r in baseline if 'error' not in r}
+    failures = []
+    for r in results:
+        old = previous.get((r['stage'], r['devices']))
+        if not old:
+            continue
+        if 'error' in r:
+            failures.append(f"{r['stage']}@{r['devices']}: {r['error']}")
+            continue
+        if r['requests_per_s'] < old['requests_per_s'] * (1 - tolerance):
+            failures.append(f"{r['stage']}@{r['devices']}: requests/s {old['requests_per_s']:.0f} -> {r['requests_per_s']:.0f}")
+        if r['p99_ms'] > old['p99_ms'] * (1 + tolerance):
+            failures.append(f"{r['stage']}@{r['devices']}: p99 {old['p99_ms']:.2f} ms -> {r['p99_ms']:.2f} ms")
+        if r['peak_rss_mb'] > old['peak_rss_mb'] * (1 + tolerance):
+            failures.append(f"{r['stage']}@{r['devices']}: peak RSS {old['peak_rss_mb']:.1f} MB -> {r['peak_rss_mb']:.1f} MB")
+    return failures
+
+
+def print_table(results):
+    print(f"{'stage':<12} {'devices':>8} {'req/s':>10} {'dev/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>8}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['stage']:<12} {r['devices']:>8}  ❌ {r['error']}")
+            continue
+        print(f"{r['stage']:<12} {r['devices']:>8} {r['requests_per_s']:>10.1f} {r['devices_per_s']:>10.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['peak_rss_mb']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fetch/transform/write paths against local mock APIs")
+    parser.add_argument('--sizes', default='1,10,100,1000,10000', help="comma-separated fleet sizes")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"comma-separated subset of {STAGES}")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="simulated server latency per request")
+    parser.add_argument('--status-points', type=int, default=10, help="data points in each Tuya status payload")
+    parser.add_argument('--edenic-points', type=int, default=56, help="points per key in each Edenic payload")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--baseline', help="previous --json output to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative regression vs baseline")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    stages = [s for s in args.stages.split(',') if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {sorted(unknown)}")
+
+    latency = args.latency_ms / 1000
+    servers = {
+        'tuya': TuyaMockServer(devices=max(sizes), status_points=args.status_points, latency=latency).start(),
+        'edenic': EdenicMockServer(points=args.edenic_points, latency=latency).start(),
+        'influx': InfluxMockServer(latency=latency).start(),
+    }
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    try:
+        for stage in stages:
+            for size in sizes:
+                result = run_case(ctx, servers, stage, size)
+                results.append(result)
+                status = result.get('error') or f"{result['devices_per_s']:.1f} devices/s"
+                print(f"{stage} @ {size} devices: {status}")
+    finally:
+        for server in servers.values():
+            server.stop()
+
+    print()
+    print_table(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = find_regressions(results, json.load(f), args.tolerance)
+        if failures:
+            print("❌ Regressions vs baseline:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("✅ No regressions vs baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Cold-start benchmark for the iot_grafana.py subcommands.
+
+Each case starts a fresh interpreter, parses the subcommand's arguments and
+imports its handler (without running it), then reports wall time and which
+heavy dependencies ended up in sys.modules.
+
+    python bench/bench_startup.py --repeat 10 --max-ms 150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'numpy', 'influxdb_client', 'cv2', 'prometheus_client', 'matplotlib', 'schedule']
+
+CASES = {
+    'cli': None,
+    'tuya-poll': ['tuya-poll'],
+    'tuya-poll-influx': ['tuya-poll', '--sink', 'influx'],
+    'edenic-pull': ['edenic-pull'],
+    'backfill': ['backfill', '--days', '30'],
+    'csv-format': ['csv-format'],
+    'feeding': ['feeding'],
+}
+
+# Cases that must not drag in any heavy dependency
+LIGHT_CASES = {'cli', 'tuya-poll'}
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+import iot_grafana
+argv = {argv!r}
+if argv is not None:
+    iot_grafana.resolve_handler(iot_grafana.build_parser().parse_args(argv))
+t1 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_probe(argv):
+    code = PROBE.format(root=REPO_ROOT, argv=argv, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr else f"exit {proc.returncode}"}
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['wall_ms'] = wall_ms
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start of each iot_grafana subcommand")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cases', default=','.join(CASES), help=f"comma-separated subset of {list(CASES)}")
+    parser.add_argument('--max-ms', type=float, help="fail if the tuya-poll median wall time exceeds this")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'case':<18} {'wall ms':>9} {'import ms':>10}  heavy modules")
+    for name in [c for c in args.cases.split(',') if c]:
+        runs = [run_probe(CASES[name]) for _ in range(args.repeat)]
+        errors = [r['error'] for r in runs if 'error' in r]
+        if errors:
+            print(f"{name:<18}  ❌ {errors[0]}")
+            continue
+        wall = statistics.median(r['wall_ms'] for r in runs)
+        imports = statistics.median(r['import_ms'] for r in runs)
+        heavy = runs[0]['heavy']
+        print(f"{name:<18} {wall:>9.1f} {imports:>10.1f}  {', '.join(heavy) or '-'}")
+
+        if name in LIGHT_CASES and heavy:
+            failures.append(f"{name} imports {', '.join(heavy)}")
+        if name == 'tuya-poll' and args.max_ms and wall > args.max_ms:
+            failures.append(f"tuya-poll cold start {wall:.1f} ms > {args.max_ms:.1f} ms")
+
+    if failures:
+        print("❌ " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
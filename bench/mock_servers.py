@@ -0,0 +1,264 @@
+import gzip
+import hashlib
+import hmac
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Default credentials the benchmark clients are configured with
+MOCK_CLIENT_ID = "benchclientid000000"
+MOCK_SECRET = "benchsecret0000000000000000000000"
+MOCK_API_KEY = "ed_benchmarkkey"
+
+
+def device_ids(count):
+    """Deterministic device IDs for a mock fleet"""
+    return [f"mockdev{i:05d}" for i in range(count)]
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+        if server.latency:
+            time.sleep(server.latency)
+        parsed = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True))
+        self.handle_get(parsed.path, query)
+
+    def do_POST(self):
+        server = self.server
+        server.count_request()
+        if server.latency:
+            time.sleep(server.latency)
+        parsed = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True))
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.handle_post(parsed.path, query, body)
+
+    def _send_empty(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def handle_get(self, path, query):
+        self._send_json({"error": "not found"}, status=404)
+
+    def handle_post(self, path, query, body):
+        self._send_json({"error": "not found"}, status=404)
+
+
+class TuyaMockHandler(_MockHandler):
+    """Tuya OpenAPI token/device endpoints with real signature verification"""
+
+    def _expected_sign(self, path, query, access_token):
+        # Mirrors Tuya's stringToSign: method, body hash, headers, sorted URL
+        url = path
+        if query:
+            url += "?" + "&".join(f"{k}={urllib.parse.quote(str(query[k]))}" for k in sorted(query))
+        body_sha256 = hashlib.sha256(b'').hexdigest()
+        sign_url = f"GET\n{body_sha256}\n\n{url}"
+        nonce = self.headers.get('nonce', '')
+        str_to_sign = self.server.client_id + access_token + self.headers.get('t', '') + nonce + sign_url
+        return hmac.new(
+            self.server.secret.encode('utf-8'),
+            str_to_sign.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest().upper()
+
+    def _error(self, code, msg):
+        self._send_json({"success": False, "code": code, "msg": msg, "t": int(time.time() * 1000)})
+
+    def handle_get(self, path, query):
+        server = self.server
+        if self.headers.get('client_id') != server.client_id:
+            return self._error(1005, "clientId is invalid")
+
+        if path == "/v1.0/token":
+            if not hmac.compare_digest(self.headers.get('sign', ''), self._expected_sign(path, query, "")):
+                return self._error(1004, "sign invalid")
+            if query.get('grant_type') != '1':
+                return self._error(1106, "permission deny")
+            return self._send_json({
+                "success": True,
+                "result": {
+                    "access_token": server.access_token,
+                    "expire_time": 7200,
+                    "refresh_token": "mockrefresh",
+                    "uid": "mockuid"
+                },
+                "t": int(time.time() * 1000)
+            })
+
+        access_token = self.headers.get('access_token', '')
+        if access_token != server.access_token:
+            return self._error(1010, "token invalid")
+        if not hmac.compare_digest(self.headers.get('sign', ''), self._expected_sign(path, query, access_token)):
+            return self._error(1004, "sign invalid")
+
+        if path == "/v1.0/iot-01/associated-users/devices":
+            return self._send_json({"success": True, "result": server.device_page(query),
+                                    "t": int(time.time() * 1000)})
+
+        parts = path.strip('/').split('/')
+        # /v1.0/devices/{id}[/status|/specifications]
+        if len(parts) < 3 or parts[:2] != ['v1.0', 'devices']:
+            return self._error(1108, "uri path invalid")
+        device_id = parts[2]
+        if device_id not in server.devices:
+            return self._error(2001, "device is offline")
+
+        index = server.devices[device_id]
+        if len(parts) == 3:
+            result = server.device_info(device_id, index)
+        elif parts[3] == 'status':
+            result = server.device_status(index)
+        elif parts[3] == 'specifications':
+            result = server.device_spec()
+        else:
+            return self._error(1108, "uri path invalid")
+        self._send_json({"success": True, "result": result, "t": int(time.time() * 1000)})
+
+
+class EdenicMockHandler(_MockHandler):
+    """Edenic telemetry endpoint returning {key: [{ts, value}, ...]}"""
+
+    def handle_get(self, path, query):
+        server = self.server
+        if self.headers.get('Authorization') != server.api_key:
+            return self._send_json({"status": 401, "message": "Authentication failed"}, status=401)
+        if not path.startswith("/api/v1/telemetry/"):
+            return self._send_json({"status": 404, "message": "Not found"}, status=404)
+
+        keys = [k for k in query.get('keys', '').split(',') if k]
+        end_ts = int(query.get('endTs', int(time.time() * 1000)))
+        interval = int(query.get('interval', 10800000))
+        self._send_json({key: server.telemetry(key, end_ts, interval) for key in keys})
+
+
+class InfluxMockHandler(_MockHandler):
+    """InfluxDB v2 write endpoint that accepts line protocol and counts points"""
+
+    def handle_post(self, path, query, body):
+        if path != "/api/v2/write":
+            return self._send_json({"code": "not found", "message": "path not found"}, status=404)
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        lines = sum(1 for line in body.splitlines() if line.strip())
+        self.server.count_points(lines)
+        self._send_empty(204)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler, latency=0.0):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.latency = latency
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._lock:
+            self.requests_served += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class TuyaMockServer(MockServer):
+    def __init__(self, devices=1, status_points=10, latency=0.0,
+                 client_id=MOCK_CLIENT_ID, secret=MOCK_SECRET):
+        super().__init__(TuyaMockHandler, latency)
+        self.client_id = client_id
+        self.secret = secret
+        self.access_token = hashlib.sha256(secret.encode('utf-8')).hexdigest()[:32]
+        self.status_points = max(1, status_points)
+        self.devices = {device_id: i for i, device_id in enumerate(device_ids(devices))}
+
+    def device_status(self, index):
+        status = [{"code": "temp_current", "value": 250 + index % 50}]
+        status.extend({"code": f"dp_{i}", "value": i} for i in range(1, self.status_points))
+        return status
+
+    def device_spec(self):
+        return {
+            "category": "wsdcg",
+            "functions": [],
+            "status": [
+                {"code": "temp_current", "type": "Integer",
+                 "values": json.dumps({"unit": "℃", "min": -200, "max": 600, "scale": 1, "step": 1})}
+            ] + [
+                {"code": f"dp_{i}", "type": "Integer", "values": "{}"} for i in range(1, self.status_points)
+            ]
+        }
+
+    def device_info(self, device_id, index):
+        return {
+            "id": device_id,
+            "name": f"Mock sensor {index}",
+            "category": "wsdcg",
+            "product_id": "mockwsdcg",
+            "online": True,
+            "status": self.device_status(index)
+        }
+
+    def device_page(self, query):
+        """One page of the project device list, keyed by last_row_key"""
+        ids = list(self.devices)
+        start = ids.index(query['last_row_key']) + 1 if query.get('last_row_key') in self.devices else 0
+        page = ids[start:start + int(query.get('size', 20))]
+        return {
+            "devices": [self.device_info(device_id, self.devices[device_id]) for device_id in page],
+            "has_more": start + len(page) < len(ids),
+            "last_row_key": page[-1] if page else None,
+            "total": len(ids)
+        }
+
+
+class InfluxMockServer(MockServer):
+    def __init__(self, latency=0.0):
+        super().__init__(InfluxMockHandler, latency)
+        self.points_written = 0
+
+    def count_points(self, count):
+        with self._lock:
+            self.points_written += count
+
+
+class EdenicMockServer(MockServer):
+    def __init__(self, points=56, latency=0.0, api_key=MOCK_API_KEY):
+        super().__init__(EdenicMockHandler, latency)
+        self.api_key = api_key
+        self.points = max(0, points)
+
+    def telemetry(self, key, end_ts, interval):
+        start = end_ts - self.points * interval
+        return [{"ts": start + i * interval, "value": f"{7 + (i % 20) / 10:.2f}"} for i in range(self.points)]
@@ -1,4 +1,6 @@
 import numpy as np
+from spectra import headless_backend, show
+headless_backend()
 import matplotlib.pyplot as plt
 
 # Constants
@@ -86,4 +88,4 @@ plt.plot(lambda_range, combined_spd)
 plt.xlabel('Wavelength (nm)')
 plt.ylabel('Normalized Radiant Power')
 plt.title('Combined SPD')
-plt.show()
\ No newline at end of file
+show('spec_combined.png')
\ No newline at end of file
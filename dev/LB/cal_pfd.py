@@ -1,20 +1,21 @@
-import pandas as pd
+from library import SpectralLibrary
+from spectra import BandIndex
 
-def calculate_pfd(file_path, factor=0.00000836):
+def calculate_pfd(file_path, factor=0.00000836, library=None):
 
-    # load csv
-    data = pd.read_csv(file_path)
+    # load through the spectral library: parsed once, memory-mapped afterwards
+    library = library or SpectralLibrary()
+    nm, si = library.load(file_path)
+    entry = library.entry(file_path)
 
-    nm_delta = data['nm'].diff().mean()
-    nm_min = data['nm'].min()
-    nm_max = data['nm'].max()
+    nm_delta = entry['nm_step']
+    nm_min, nm_max = (int(v) if float(v).is_integer() else float(v) for v in (nm[0], nm[-1]))
 
-    # calculate contribution (nm * si)
-    data['nm_si'] = data['nm'] * data['si']
+    # prefix sums of the contribution (nm * si): every band is one lookup
+    index = BandIndex(nm, si)
 
     # define RBG, PAR
     ranges = {
-        'total': (nm_min, nm_max),
         'par': (400, 700),
         'r': (600, 699),
         'g': (500, 599),
@@ -23,13 +24,10 @@ def calculate_pfd(file_path, factor=0.00000836):
     }
 
     # calculate pfd
-    pfd_out = {}
-    for key, (start, end) in ranges.items():
-        sum_range = data[(data['nm'] >= start) & (data['nm'] <= end)]['nm_si'].sum()
-        pfd_out[f'pfd_{key}'] = round(factor * sum_range, 3)
+    pfd_out = {key: round(value, 3) for key, value in index.pfd(ranges, factor).items()}
 
     # include nm_delta, nm_min, and nm_max
-    pfd_out['nm_delta'] = int(nm_delta)
+    pfd_out['nm_delta'] = nm_delta
     pfd_out['nm_min'] = nm_min
     pfd_out['nm_max'] = nm_max
 
@@ -44,7 +42,7 @@ if __name__ == "__main__":
     pfd_out = calculate_pfd(file_path)
 
     # output
-    print(f"Spectural range: {pfd_out['nm_min']} - {pfd_out['nm_max']} nm; Wavelength step: {pfd_out['nm_delta']} nm")
+    print(f"Spectural range: {pfd_out['nm_min']} - {pfd_out['nm_max']} nm; Wavelength step: {pfd_out['nm_delta']:g} nm")
     print(f"PFD: {pfd_out['pfd_total']}")
     print(f"PFD-R: {pfd_out['pfd_r']} | PFD-G: {pfd_out['pfd_g']} | PFD-B: {pfd_out['pfd_b']} | PFD-FR: {pfd_out['pfd_fr']}")
     print(f"PFD-PAR: {pfd_out['pfd_par']}")
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+LED-mix optimizer: every combination of LED counts and drive powers at once.
+
+LED types and efficiencies come from led_config.txt; each type's spectrum is
+the Gaussian shape used in spd.py, converted to a photon distribution that
+integrates to one over the modelled range. R:B and R:FR are left undefined
+(NaN) for mixes with next to nothing in the blue or far-red band. Photon flux
+is linear in the mix, so the (mixes x types) flux matrix times the
+(types x wavelengths) shape matrix is the mixes' spectra, and band totals
+are that product folded through band masks first, (mixes x types) @
+(types x bands), without materialising every spectrum. spectra() builds
+the full rows for the mixes you keep.
+
+    python led_mix.py --ppfd 250 --rb 3
+    python led_mix.py --ppfd 400 --rb 2.5 --max-count 8 --powers 0.25,0.5,1 --output pareto.csv
+"""
+import argparse
+import math
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'led_config.txt')
+WAVELENGTHS = np.arange(350, 801, 1.0)
+PEAK_WIDTH = 10  # nm, as in spd.py
+SAFETY_MARGIN = 0.10  # as in watt.py
+AREA = math.pi * ((150 / 2) / 10 / 100) ** 2  # m², the ppfd.py disc
+BANDS = {'par': (400, 700), 'b': (400, 499), 'g': (500, 599), 'r': (600, 699), 'fr': (700, 799)}
+RATIO_FLOOR = 1e-3  # a band below this fraction of PAR flux is only a Gaussian tail; ratios over it are undefined
+
+
+def load_led_types(path=CONFIG_FILE):
+    """[(name, [peak nm, ...], efficiency µmol/J)] from the 'LED Specifications' list"""
+    pattern = re.compile(r'^\d+\.\s*(.+?)\s*\(([\d\s+]+)nm\):\s*Efficiency\s*=\s*([\d.]+)')
+    types = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            match = pattern.match(line.strip())
+            if match:
+                name, peaks, efficiency = match.groups()
+                types.append((name, [float(p) for p in peaks.split('+')], float(efficiency)))
+    if not types:
+        raise ValueError(f"No LED specifications found in {path}")
+    return types
+
+
+def photon_shapes(types, wavelengths=WAVELENGTHS):
+    """
+    (types x wavelengths) photon distributions, each summing to 1 over the
+    whole range: efficiency is total photon flux, so a far-red LED is not
+    scaled up to deliver its rating inside PAR
+    """
+    peaks = [np.mean([np.exp(-((wavelengths - p) / PEAK_WIDTH) ** 2) for p in t[1]], axis=0) for t in types]
+    photons = np.array(peaks) * wavelengths  # radiant power -> photon count ∝ E·λ/hc
+    return photons / photons.sum(axis=1, keepdims=True)
+
+
+def band_matrix(shapes, wavelengths=WAVELENGTHS, bands=BANDS):
+    """(types x bands) fraction of each type's PPF falling in each band"""
+    masks = np.array([(wavelengths >= lo) & (wavelengths <= hi) for lo, hi in bands.values()], dtype=np.float64)
+    return shapes @ masks.T
+
+
+def enumerate_mixes(n_types, max_count, powers):
+    """(mixes x types) LED counts and per-LED drive powers covering every combination"""
+    # Per type: either no LEDs, or 1..max_count LEDs at one of the drive powers
+    options = [(0, 0.0)] + [(n, p) for n in range(1, max_count + 1) for p in powers]
+    option_counts = np.array([o[0] for o in options], dtype=np.float64)
+    option_powers = np.array([o[1] for o in options], dtype=np.float64)
+    index = np.indices((len(options),) * n_types).reshape(n_types, -1).T[1:]  # drop the empty mix
+    return option_counts[index], option_powers[index]
+
+
+def evaluate(counts, drives, types, area=AREA, bands=BANDS):
+    """Metrics table for every mix (vectorized over rows)"""
+    efficiency = np.array([t[2] for t in types])
+    watts = counts * drives                      # (mixes x types)
+    flux = watts * efficiency                    # µmol/s of photons per type
+    band_flux = flux @ band_matrix(photon_shapes(types), bands=bands)  # (mixes x bands)
+    names = list(bands)
+    table = pd.DataFrame(band_flux / area, columns=[f'ppfd_{n}' for n in names])
+    red, par = band_flux[:, names.index('r')], band_flux[:, names.index('par')]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for column, band in (('r_b', 'b'), ('r_fr', 'fr')):
+            below = band_flux[:, names.index(band)]
+            table[column] = np.where(below >= RATIO_FLOOR * par, red / below, np.nan)
+    table['wattage'] = watts.sum(axis=1) * (1 + SAFETY_MARGIN)
+    table['efficacy'] = flux.sum(axis=1) / watts.sum(axis=1)
+    for i, (name, _, _) in enumerate(types):
+        table[f'n_{name}'] = counts[:, i].astype(int)
+        table[f'w_{name}'] = drives[:, i]
+    return table
+
+
+def pareto_mask(objectives):
+    """Boolean mask of rows not dominated on every (minimised) objective column"""
+    # In lexicographic order no later row can dominate an earlier one, so one pass suffices
+    order = np.lexsort(objectives.T[::-1])
+    kept = np.empty_like(objectives)
+    front = []
+    for i in order:
+        row = objectives[i]
+        done = kept[:len(front)]
+        if len(front) and np.any((done <= row).all(axis=1) & (done < row).any(axis=1)):
+            continue
+        kept[len(front)] = row
+        front.append(i)
+    mask = np.zeros(len(objectives), dtype=bool)
+    mask[front] = True
+    return mask
+
+
+def optimize(types, target_ppfd, target_rb=None, target_rfr=None, max_count=6, powers=(0.25, 0.5, 0.75, 1.0),
+             tolerance=0.1, area=AREA):
+    """Pareto set over |PPFD error|, ratio errors and wattage among mixes within tolerance of the PPFD target"""
+    counts, drives = enumerate_mixes(len(types), max_count, powers)
+    table = evaluate(counts, drives, types, area)
+    objectives = {'ppfd_error': (table['ppfd_par'] - target_ppfd).abs() / target_ppfd}
+    if target_rb is not None:
+        objectives['rb_error'] = (table['r_b'] - target_rb).abs().fillna(np.inf)
+    if target_rfr is not None and table['r_fr'].isna().all():
+        print("⚠️ No LED type emits far-red; R:FR is undefined and the --rfr objective is ignored")
+    elif target_rfr is not None:
+        objectives['rfr_error'] = (table['r_fr'] - target_rfr).abs().fillna(np.inf)
+    objectives['wattage'] = table['wattage']
+    for name, values in objectives.items():
+        table[name] = values
+    table['leds'] = counts.sum(axis=1).astype(int)
+    candidates = table[table['ppfd_error'] <= tolerance]
+    # Mixes with identical metrics (3 LEDs at 0.5 W vs 2 at 0.75 W): keep the one with fewest LEDs
+    candidates = candidates.sort_values('leds', kind='stable').drop_duplicates(
+        subset=[c for c in candidates.columns if c.startswith('ppfd_')] + ['wattage'])
+    front = candidates[pareto_mask(candidates[list(objectives)].to_numpy())]
+    return front.sort_values(['wattage', 'leds']), len(table)
+
+
+def spectra(front, types, wavelengths=WAVELENGTHS):
+    """(mixes x wavelengths) photon flux spectra (µmol/s/nm) for chosen rows of a results table"""
+    efficiency = np.array([t[2] for t in types])
+    flux = np.stack([front[f'n_{t[0]}'] * front[f'w_{t[0]}'] for t in types], axis=1) * efficiency
+    return flux @ photon_shapes(types, wavelengths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pareto-optimal LED mixes for a PPFD target")
+    parser.add_argument('--ppfd', type=float, required=True, help="target PPFD (µmol/m²/s) over the area")
+    parser.add_argument('--rb', type=float, help="target red:blue photon ratio")
+    parser.add_argument('--rfr', type=float, help="target red:far-red photon ratio")
+    parser.add_argument('--max-count', type=int, default=6, help="LEDs per type, 0..N")
+    parser.add_argument('--powers', default='0.25,0.5,0.75,1.0', help="drive powers per LED (W)")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="allowed relative PPFD error")
+    parser.add_argument('--radius', type=float, help="lit disc radius in m (default: the ppfd.py 7.5 cm)")
+    parser.add_argument('--config', default=CONFIG_FILE)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--output', help="write the full Pareto set to this CSV")
+    args = parser.parse_args()
+
+    types = load_led_types(args.config)
+    area = math.pi * args.radius ** 2 if args.radius else AREA
+    powers = [float(p) for p in args.powers.split(',')]
+    front, evaluated = optimize(types, args.ppfd, args.rb, args.rfr, args.max_count, powers, args.tolerance, area)
+    print(f"{evaluated} mixes evaluated, {len(front)} on the Pareto front")
+    columns = ['wattage', 'leds', 'ppfd_par', 'r_b', 'r_fr'] + [c for c in front.columns if c.startswith(('n_', 'w_'))]
+    print(front[columns].head(args.top).round(3).to_string(index=False))
+    if args.output:
+        front.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
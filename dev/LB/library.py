@@ -0,0 +1,167 @@
+"""
+Spectral library: spectrometer CSVs converted once into .npy arrays that are
+memory-mapped on every later use, plus a metadata index.
+
+    python library.py runs/ source.csv     # import/refresh, then list the index
+
+Each entry records the source's size, mtime and SHA-1, the wavelength range,
+mean step, whether the grid is regular, and the decimal precision of 'si'
+(computed vectorized from the CSV text at import). A source is re-parsed only
+when its size or mtime changes and its content hash differs.
+"""
+import glob
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.spectra')
+INDEX_FILE = 'index.json'
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def decimal_places(text):
+    """Decimal places of each numeric string (trailing zeros ignored), vectorized"""
+    text = np.char.strip(np.asarray(text, dtype=str))
+    text = np.char.partition(np.char.lower(text), 'e')[:, 0]  # mantissa of 1.5e-05
+    fraction = np.char.partition(text, '.')[:, 2]
+    return np.char.str_len(np.char.rstrip(fraction, '0'))
+
+
+def convert(path, array_path):
+    """Parse a spectrometer CSV into a (2, n) float64 .npy (nm, si); returns its metadata"""
+    data = pd.read_csv(path, usecols=['nm', 'si'], dtype={'si': str})
+    si_text = data['si'].fillna('').to_numpy(dtype=str)
+    nm = data['nm'].to_numpy(dtype=np.float64)
+    si = pd.to_numeric(data['si'], errors='coerce').to_numpy(dtype=np.float64)
+    order = np.argsort(nm, kind='stable')
+    nm, si, si_text = nm[order], si[order], si_text[order]
+
+    tmp = f"{array_path}.tmp.npy"
+    np.save(tmp, np.stack([nm, si]))
+    os.replace(tmp, array_path)
+
+    steps = np.diff(nm)
+    decimals = decimal_places(si_text[si_text != ''])
+    return {
+        'array': os.path.basename(array_path),
+        'points': int(nm.size),
+        'nm_min': float(nm[0]) if nm.size else None,
+        'nm_max': float(nm[-1]) if nm.size else None,
+        'nm_step': float(steps.mean()) if steps.size else None,
+        'regular': bool(steps.size and np.allclose(steps, steps[0], atol=1e-6)),
+        'si_decimals_min': int(decimals.min()) if decimals.size else 0,
+        'si_decimals_max': int(decimals.max()) if decimals.size else 0,
+    }
+
+
+class SpectralLibrary:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+
+    def save(self):
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def _key(self, path):
+        return os.path.realpath(path)
+
+    def _stale(self, path):
+        """None if the cached entry is current, else the source's new (stat, hash or None)"""
+        stat = os.stat(path)
+        entry = self.index.get(self._key(path))
+        signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if entry is None or not os.path.exists(os.path.join(self.cache_dir, entry['array'])):
+            return signature
+        if all(entry[k] == v for k, v in signature.items()):
+            return None
+        # Touched or copied: keep the arrays if the bytes are the same
+        digest = file_hash(path)
+        if digest == entry['sha1']:
+            entry.update(signature)
+            return None
+        signature['sha1'] = digest
+        return signature
+
+    def sync(self, paths, workers=None):
+        """Import every new or changed source (in parallel) and save the index"""
+        todo = {}
+        for path in paths:
+            signature = self._stale(path)
+            if signature is not None:
+                todo[path] = signature
+        if todo:
+            key_of = {path: self._key(path) for path in todo}
+            array_paths = [os.path.join(self.cache_dir, hashlib.sha1(key_of[p].encode()).hexdigest()[:16] + '.npy')
+                           for p in todo]
+            if len(todo) < 8 or workers == 1:
+                metas = [convert(p, a) for p, a in zip(todo, array_paths)]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    metas = list(pool.map(convert, todo, array_paths, chunksize=8))
+            for (path, signature), meta in zip(todo.items(), metas):
+                meta.update(signature)
+                if 'sha1' not in meta:
+                    meta['sha1'] = file_hash(path)
+                meta['source'] = path
+                self.index[key_of[path]] = meta
+        self.save()
+        return len(todo)
+
+    def entry(self, path):
+        """Metadata for a source, importing it first if needed"""
+        if self._stale(path) is not None:
+            self.sync([path])
+        return self.index[self._key(path)]
+
+    def array_path(self, path):
+        return os.path.join(self.cache_dir, self.entry(path)['array'])
+
+    def load(self, path):
+        """(nm, si) read-only memory-mapped arrays for a source"""
+        return load_array(self.array_path(path))
+
+    def table(self, paths=None):
+        """Metadata index as a DataFrame"""
+        entries = self.index.values() if paths is None else [self.index[self._key(p)] for p in paths]
+        return pd.DataFrame(list(entries))
+
+
+def load_array(array_path):
+    arrays = np.load(array_path, mmap_mode='r')
+    return arrays[0], arrays[1]
+
+
+def load_spectrum(path, library=None):
+    """(nm, si) through a library, creating the default one if none is given"""
+    return (library or SpectralLibrary()).load(path)
+
+
+if __name__ == "__main__":
+    paths = []
+    for item in sys.argv[1:] or ['source.csv']:
+        paths += sorted(glob.glob(os.path.join(item, '*.csv'))) if os.path.isdir(item) else [item]
+    library = SpectralLibrary()
+    imported = library.sync(paths)
+    print(f"{imported} of {len(paths)} spectra imported into {library.cache_dir}")
+    columns = ['source', 'points', 'nm_min', 'nm_max', 'nm_step', 'regular', 'si_decimals_min']
+    print(library.table(paths)[columns].to_string(index=False))
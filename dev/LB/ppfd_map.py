@@ -0,0 +1,140 @@
+"""
+Spatial PPFD over the culture surface from several fixtures.
+
+ppfd.py divides PPF by the lit area, i.e. assumes perfectly even light. Here
+every fixture is a downward-facing emitter with a generalised Lambertian beam,
+I(θ) = PPF (m + 1) / 2π · cos^m θ, where m follows from the beam half-angle
+(m = 1 is a bare LED, larger m a lensed one). PPFD at a surface point is
+I(θ) · cos θ / d², summed over fixtures (inverse-square and cosine falloff).
+Grid points are processed in chunks so fine grids with many fixtures stay
+within a fixed memory budget.
+
+    python ppfd_map.py                                        # ppfd.py example, 1 fixture at 10 cm
+    python ppfd_map.py --array 3x3 --spacing 0.05 --height 0.12 --ppf 10 --beam 120 --radius 0.15
+    python ppfd_map.py --fixtures lamps.csv --rect 0.6x0.4 --step 0.005 --output map.npy
+
+lamps.csv columns: x, y, height (m), ppf (µmol/s), beam (full angle, degrees).
+"""
+import argparse
+import math
+
+import numpy as np
+import pandas as pd
+
+RADIUS = (150 / 2) / 10 / 100  # m, as in ppfd.py
+PPF = 15 * 2  # µmol/s: 15 W at 2 µmol/J, as in ppfd.py
+HEIGHT = 0.10  # m
+BEAM = 120  # degrees, full width at half maximum of a bare LED (Lambertian)
+CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def lambertian_order(beam_degrees):
+    """m such that cos^m reaches 1/2 at half the beam angle (0 < beam < 180)"""
+    if not 0 < beam_degrees < 180:
+        # cos^m only reaches 1/2 before 90° off-axis; 180° would need m = 0, a flat (isotropic) hemisphere
+        raise ValueError(f"beam angle must be between 0 and 180 degrees (exclusive), got {beam_degrees:g}")
+    half = math.radians(beam_degrees) / 2
+    return -math.log(2) / math.log(math.cos(half))
+
+
+def surface_grid(step, radius=None, rect=None):
+    """(x, y) of grid points covering a disc (centred at 0) or a rectangle (corner at 0)"""
+    if rect is not None:
+        width, depth = rect
+        xs = np.arange(step / 2, width, step)
+        ys = np.arange(step / 2, depth, step)
+        gx, gy = np.meshgrid(xs, ys)
+        inside = np.ones(gx.shape, dtype=bool)
+    else:
+        xs = np.arange(-radius + step / 2, radius, step)
+        gx, gy = np.meshgrid(xs, xs)
+        inside = gx ** 2 + gy ** 2 <= radius ** 2
+    return gx, gy, inside
+
+
+def ppfd_map(points_x, points_y, fixtures, chunk_bytes=CHUNK_BYTES):
+    """PPFD (µmol/m²/s) at each point from fixtures (n x 5: x, y, height, ppf, beam)"""
+    fixtures = np.asarray(fixtures, dtype=np.float64).reshape(-1, 5)
+    fx, fy, fh, ppf, beam = fixtures.T
+    m = np.array([lambertian_order(b) for b in beam])
+    intensity0 = ppf * (m + 1) / (2 * math.pi)  # on-axis µmol/s/sr
+
+    px, py = points_x.ravel(), points_y.ravel()
+    out = np.empty(px.size)
+    chunk = max(1, chunk_bytes // (8 * 4 * len(fixtures)))  # a few (chunk x fixtures) temporaries
+    for start in range(0, px.size, chunk):
+        sl = slice(start, start + chunk)
+        d2 = (px[sl, None] - fx) ** 2 + (py[sl, None] - fy) ** 2 + fh ** 2
+        cos = fh / np.sqrt(d2)
+        # I(θ) cos θ / d² with I(θ) = I0 cos^m θ
+        out[sl] = (intensity0 * cos ** (m + 1) / d2).sum(axis=1)
+    return out.reshape(points_x.shape)
+
+
+def uniformity(values):
+    """Summary metrics over the lit surface"""
+    mean = values.mean()
+    return {
+        'min': values.min(),
+        'mean': mean,
+        'max': values.max(),
+        'min_mean': values.min() / mean,
+        'min_max': values.min() / values.max(),
+        'cv': values.std() / mean,
+    }
+
+
+def array_layout(rows, cols, spacing, height, ppf, beam, center=(0.0, 0.0)):
+    """Fixtures on a regular rows x cols grid centred over `center`"""
+    xs = (np.arange(cols) - (cols - 1) / 2) * spacing + center[0]
+    ys = (np.arange(rows) - (rows - 1) / 2) * spacing + center[1]
+    gx, gy = np.meshgrid(xs, ys)
+    n = gx.size
+    return np.column_stack([gx.ravel(), gy.ravel(), np.full(n, height), np.full(n, ppf), np.full(n, beam)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PPFD map and uniformity over the culture surface")
+    parser.add_argument('--fixtures', help="CSV of x,y,height,ppf,beam per fixture")
+    parser.add_argument('--array', default='1x1', help="rows x cols fixture array when no --fixtures")
+    parser.add_argument('--spacing', type=float, default=0.05, help="array pitch (m)")
+    parser.add_argument('--height', type=float, default=HEIGHT, help="fixture height above the surface (m)")
+    parser.add_argument('--ppf', type=float, default=PPF, help="PPF per fixture (µmol/s)")
+    parser.add_argument('--beam', type=float, default=BEAM, help="beam angle per fixture (degrees)")
+    parser.add_argument('--radius', type=float, default=RADIUS, help="disc surface radius (m)")
+    parser.add_argument('--rect', help="rectangular surface WxD (m) instead of a disc")
+    parser.add_argument('--step', type=float, help="grid step (m); default: 200 points across")
+    parser.add_argument('--output', help="save the PPFD grid (.npy, NaN outside the surface)")
+    args = parser.parse_args()
+
+    rect = tuple(float(v) for v in args.rect.split('x')) if args.rect else None
+    if args.fixtures:
+        fixtures = pd.read_csv(args.fixtures)[['x', 'y', 'height', 'ppf', 'beam']].to_numpy()
+    else:
+        rows, cols = (int(v) for v in args.array.split('x'))
+        center = (rect[0] / 2, rect[1] / 2) if rect else (0.0, 0.0)
+        fixtures = array_layout(rows, cols, args.spacing, args.height, args.ppf, args.beam, center)
+
+    extent = max(rect) if rect else 2 * args.radius
+    step = args.step or extent / 200
+    gx, gy, inside = surface_grid(step, args.radius, rect)
+    try:
+        grid = ppfd_map(gx, gy, fixtures)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    stats = uniformity(grid[inside])
+
+    area = rect[0] * rect[1] if rect else math.pi * args.radius ** 2
+    total_ppf = fixtures[:, 3].sum()
+    captured = grid[inside].sum() * step ** 2
+    print(f"{len(fixtures)} fixtures, {total_ppf:.1f} µmol/s, {inside.sum()} grid points at {step * 1000:.1f} mm")
+    print(f"Uniform estimate (ppfd.py): {total_ppf / area:.2f} µmol/m²s")
+    print(f"PPFD min {stats['min']:.2f} | mean {stats['mean']:.2f} | max {stats['max']:.2f} µmol/m²s")
+    print(f"Uniformity min/mean {stats['min_mean']:.3f} | min/max {stats['min_max']:.3f} | CV {stats['cv']:.3f}")
+    print(f"Photons reaching the surface: {captured / total_ppf:.1%}")
+    if args.output:
+        np.save(args.output, np.where(inside, grid, np.nan))
+
+
+if __name__ == "__main__":
+    main()
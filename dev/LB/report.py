@@ -0,0 +1,165 @@
+"""
+Headless lighting report: SPD plots and band PFD tables for a whole lamp
+inventory in one job, no display needed.
+
+    python report.py runs/ source.csv --output report/
+    python report.py --mixes pareto.csv --output report/ --workers 4
+
+Spectrometer CSVs are read through the spectral library; LED mixes come from
+a led_mix.py results CSV. Plots are rendered in a process pool on the Agg
+backend; every worker builds one figure template (axes, band shading,
+labels) and only swaps the line data and text per spectrum. The output
+directory gets one PNG per spectrum, summary.csv and index.html.
+"""
+import argparse
+import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from library import SpectralLibrary, load_array
+from spectra import BANDS, BandIndex, FACTOR, collect_paths, headless_backend
+
+headless_backend(force=True)
+import matplotlib.pyplot as plt
+
+BAND_COLORS = {'b': '#3b6fd8', 'g': '#3ca34a', 'r': '#d83b3b', 'fr': '#7a1f1f'}
+DPI = 100
+
+_template = None  # per-process figure reused for every plot
+
+
+class PlotTemplate:
+    """A figure whose static parts are drawn once; render() only updates data"""
+
+    def __init__(self):
+        self.fig, self.ax = plt.subplots(figsize=(8, 4.5), dpi=DPI)
+        for band, color in BAND_COLORS.items():
+            lo, hi = BANDS[band]
+            self.ax.axvspan(lo, hi + 1, color=color, alpha=0.08, lw=0)
+        self.ax.set_xlabel('Wavelength (nm)')
+        self.ax.grid(alpha=0.3)
+        self.line, = self.ax.plot([], [], color='black', lw=1.2)
+        self.text = self.ax.text(0.99, 0.97, '', transform=self.ax.transAxes, ha='right', va='top',
+                                 family='monospace', fontsize=8,
+                                 bbox={'facecolor': 'white', 'alpha': 0.8, 'lw': 0})
+
+    def render(self, nm, values, title, ylabel, summary, path):
+        self.line.set_data(nm, values)
+        self.ax.set_xlim(nm[0], nm[-1])
+        top = float(np.nanmax(values)) if len(values) else 1.0
+        self.ax.set_ylim(0, top * 1.1 if top > 0 else 1.0)
+        self.ax.set_title(title)
+        self.ax.set_ylabel(ylabel)
+        self.text.set_text(summary)
+        self.fig.savefig(path)
+
+
+def template():
+    global _template
+    if _template is None:
+        _template = PlotTemplate()
+    return _template
+
+
+def slug(text):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', text).strip('_') or 'spectrum'
+
+
+def render_spectrum(item, output_dir):
+    """Worker: plot one spectrometer CSV and return its summary row"""
+    source, array_path, image = item
+    nm, si = load_array(array_path)
+    pfd = BandIndex(nm, si).pfd(factor=FACTOR)
+    summary = '\n'.join(f"{k[4:]:>5}: {v:8.3f}" for k, v in pfd.items())
+    template().render(nm, si, os.path.basename(source), 'Spectral irradiance (W/m²/nm)',
+                      f"PFD µmol/m²s\n{summary}", os.path.join(output_dir, image))
+    return {'name': source, 'image': image, **{k: round(v, 3) for k, v in pfd.items()}}
+
+
+def render_mix(item, output_dir):
+    """Worker: plot one LED mix (photon flux spectrum) and return its summary row"""
+    import led_mix
+
+    row, types, image = item
+    mix = pd.DataFrame([row])
+    flux = led_mix.spectra(mix, types)[0]
+    label = ', '.join(f"{int(row[f'n_{t[0]}'])}x{t[0]}@{row[f'w_{t[0]}']:g}W" for t in types
+                      if row[f'n_{t[0]}'])
+    summary = (f"PPFD PAR {row['ppfd_par']:8.1f}\nR:B      {row['r_b']:8.2f}\n"
+               f"Watts    {row['wattage']:8.2f}")
+    template().render(led_mix.WAVELENGTHS, flux, label, 'Photon flux (µmol/s/nm)', summary,
+                      os.path.join(output_dir, image))
+    return {'name': label, 'image': image, **{k: row[k] for k in ('ppfd_par', 'r_b', 'r_fr', 'wattage')}}
+
+
+def render_chunk(kind, items, output_dir):
+    render = render_spectrum if kind == 'spectrum' else render_mix
+    return [render(item, output_dir) for item in items]
+
+
+def write_html(summary, path, title="Lighting report"):
+    rows = []
+    for _, row in summary.iterrows():
+        cells = ''.join(f"<td>{html.escape(str(v))}</td>" for k, v in row.items() if k != 'image')
+        rows.append(f"<tr>{cells}<td><img src=\"{html.escape(row['image'])}\" width=\"400\"></td></tr>")
+    header = ''.join(f"<th>{html.escape(k)}</th>" for k in summary.columns if k != 'image') + '<th>SPD</th>'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"<!doctype html><meta charset=\"utf-8\"><title>{title}</title>"
+                f"<style>body{{font-family:sans-serif}}td,th{{padding:4px 8px;border-bottom:1px solid #ddd}}</style>"
+                f"<h1>{title}</h1><table><tr>{header}</tr>{''.join(rows)}</table>")
+
+
+def build_report(paths=(), mixes=None, output_dir='report', workers=None, top=50):
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = []
+    if paths:
+        library = SpectralLibrary()
+        library.sync(paths, workers)
+        items = [(p, library.array_path(p), f"{i:04d}_{slug(os.path.basename(p))}.png") for i, p in enumerate(paths)]
+        jobs.append(('spectrum', items))
+    if mixes is not None:
+        import led_mix
+
+        types = led_mix.load_led_types()
+        rows = pd.read_csv(mixes).head(top).to_dict('records')
+        jobs.append(('mix', [(row, types, f"mix_{i:04d}.png") for i, row in enumerate(rows)]))
+
+    workers = workers or os.cpu_count() or 1
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for kind, items in jobs:
+            size = max(1, -(-len(items) // workers))
+            futures += [pool.submit(render_chunk, kind, items[i:i + size], output_dir)
+                        for i in range(0, len(items), size)]
+        for future in futures:
+            results += future.result()
+
+    summary = pd.DataFrame(results)
+    summary.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    write_html(summary, os.path.join(output_dir, 'index.html'))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render SPD plots and PFD tables without a display")
+    parser.add_argument('inputs', nargs='*', help="spectrometer CSV files or directories")
+    parser.add_argument('--mixes', help="led_mix.py results CSV to plot")
+    parser.add_argument('--top', type=int, default=50, help="mixes to plot from --mixes")
+    parser.add_argument('--output', default='report')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    paths = collect_paths(args.inputs)
+    if not paths and not args.mixes:
+        raise SystemExit("Nothing to report: give spectrum files and/or --mixes")
+    summary = build_report(paths, args.mixes, args.output, args.workers, args.top)
+    print(f"{len(summary)} plots -> {os.path.join(args.output, 'index.html')}")
+
+
+if __name__ == "__main__":
+    main()
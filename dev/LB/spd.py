@@ -1,4 +1,6 @@
 import numpy as np
+from spectra import headless_backend, show
+headless_backend()
 import matplotlib.pyplot as plt
 
 # Constants
@@ -43,7 +45,7 @@ plt.plot(lambda_range, combined_spd)
 plt.xlabel('Wavelength (nm)')
 plt.ylabel('Normalized Radiant Power')
 plt.title('Combined SPD')
-plt.show()
+show('spd_normalized.png')
 
 # Example SPDs (absolute)
 def deep_red_spd(lambda_val, power=10):  # W/m²
@@ -69,4 +71,4 @@ plt.plot(lambda_range, combined_spd_abs)
 plt.xlabel('Wavelength (nm)')
 plt.ylabel('Spectral Power (W/m²/nm)')
 plt.title('Combined SPD in W/m²/nm')
-plt.show()
\ No newline at end of file
+show('spd_absolute.png')
\ No newline at end of file
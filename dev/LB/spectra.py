@@ -0,0 +1,185 @@
+"""
+Spectral engine: band photon-flux integrals for many spectrometer exports.
+
+A spectrum is loaded once into NumPy arrays and indexed by the cumulative sum
+of nm * si weighted by each sample's wavelength interval, so the integral over
+any wavelength band is two interpolated lookups and a subtraction, however
+many bands are asked for. Grids may have any step, or none: each spectrum in a
+batch keeps its own grid.
+
+    python spectra.py source.csv
+    python spectra.py runs/ --band uva=350-399 --band deep_red=650-670 --output pfd.csv
+
+Spectra are read through the spectral library (library.py), so repeated runs
+memory-map cached arrays instead of re-parsing the CSVs.
+"""
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from library import SpectralLibrary, load_array
+
+FACTOR = 0.00000836  # si in W/m²/nm -> µmol/m²/s, per nm of wavelength
+
+# name -> inclusive (start, end) nm; 'total' always covers the whole spectrum
+BANDS = {
+    'par': (400, 700),
+    'r': (600, 699),
+    'g': (500, 599),
+    'b': (400, 499),
+    'fr': (700, 799),
+}
+
+
+def read_spectrum(path):
+    """(nm, si) float64 arrays parsed from a CSV with 'nm' and 'si' columns, sorted by nm"""
+    data = pd.read_csv(path, usecols=['nm', 'si'])
+    nm = data['nm'].to_numpy(dtype=np.float64)
+    si = data['si'].to_numpy(dtype=np.float64)
+    order = np.argsort(nm, kind='stable')
+    return nm[order], si[order]
+
+
+def sample_widths(nm):
+    """
+    Wavelength interval each sample stands for: half the gap to each
+    neighbour, the full one-sided gap at the ends. Every sample of a 1 nm grid
+    weighs 1, so band sums match the plain nm * si sums; on coarse or irregular
+    grids the weighted sum is a midpoint (width-weighted Riemann) sum, not the
+    trapezoidal rule, whose half-weight end samples would change 1 nm results.
+    """
+    if nm.size < 2:
+        return np.ones_like(nm)
+    gaps = np.diff(nm)
+    widths = np.empty_like(nm)
+    widths[1:-1] = (gaps[:-1] + gaps[1:]) / 2
+    widths[0], widths[-1] = gaps[0], gaps[-1]
+    return widths
+
+
+class BandIndex:
+    """
+    Prefix sums of nm * si * Δnm over one spectrum, on any wavelength grid.
+
+    Each sample covers the cell between the midpoints to its neighbours.
+    Bands are inclusive whole-nm bounds, i.e. [start - 0.5, end + 0.5] nm, and
+    a cell cut by a band edge counts in proportion to its overlap; on a 1 nm
+    grid every edge falls between cells and the integral is the plain sum.
+    """
+
+    def __init__(self, nm, si):
+        self.nm = nm
+        self.si = si
+        widths = sample_widths(nm)
+        self.edges = np.concatenate((nm[:1] - widths[:1] / 2, nm + np.append(np.diff(nm), widths[-1:]) / 2))
+        self.cumulative = np.concatenate(([0.0], np.cumsum(nm * si * widths)))
+
+    def integral(self, start, end):
+        """Integral of nm * si over [start - 0.5, end + 0.5] nm; vectorized over arrays of bounds"""
+        start = np.asarray(start, dtype=np.float64) - 0.5
+        end = np.asarray(end, dtype=np.float64) + 0.5
+        return np.interp(end, self.edges, self.cumulative) - np.interp(start, self.edges, self.cumulative)
+
+    def pfd(self, bands=None, factor=FACTOR):
+        """{'pfd_<band>': value} for 'total' and every band"""
+        bands = {'total': (-np.inf, np.inf), **(BANDS if bands is None else bands)}
+        starts, ends = (np.array(bounds, dtype=np.float64) for bounds in zip(*bands.values()))
+        values = factor * self.integral(starts, ends)
+        return {f'pfd_{name}': float(value) for name, value in zip(bands, values)}
+
+
+def headless_backend(argv=None, force=False):
+    """Switch matplotlib to Agg when run with --save (or always, with force): show() then writes PNGs"""
+    if force or '--save' in (sys.argv if argv is None else argv):
+        import matplotlib
+        matplotlib.use('Agg')
+
+
+def show(filename):
+    """plt.show() on a display, otherwise save the figure"""
+    import matplotlib
+    import matplotlib.pyplot as plt
+    if matplotlib.get_backend().lower() == 'agg':
+        plt.savefig(filename)
+        plt.close()
+        print(f"Saved {filename}")
+    else:
+        plt.show()
+
+
+def analyze_file(path, bands=None, factor=FACTOR, decimals=3, array_path=None):
+    """One results row for a spectrometer CSV (read from its library array if given)"""
+    nm, si = load_array(array_path) if array_path else read_spectrum(path)
+    row = {'file': path}
+    row.update({k: round(v, decimals) for k, v in BandIndex(nm, si).pfd(bands, factor).items()})
+    row['nm_min'] = nm[0]
+    row['nm_max'] = nm[-1]
+    steps = np.diff(nm)
+    row['nm_delta'] = float(steps.mean()) if steps.size else 0.0
+    row['regular'] = bool(steps.size and np.allclose(steps, steps[0], atol=1e-6))
+    return row
+
+
+def collect_paths(inputs):
+    paths = []
+    for item in inputs:
+        paths += sorted(glob.glob(os.path.join(item, '*.csv'))) if os.path.isdir(item) else [item]
+    return paths
+
+
+def batch(paths, bands=None, factor=FACTOR, workers=None, library=None):
+    """Results table (one row per spectrum) computed across worker processes"""
+    array_paths = [None] * len(paths)
+    if library is not None:
+        library.sync(paths, workers)
+        array_paths = [library.array_path(path) for path in paths]
+    n = len(paths)
+    if n < 8 or workers == 1:
+        rows = [analyze_file(path, bands, factor, array_path=a) for path, a in zip(paths, array_paths)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, n // (4 * (workers or os.cpu_count() or 1)))
+            rows = list(pool.map(analyze_file, paths, [bands] * n, [factor] * n, [3] * n, array_paths,
+                                 chunksize=chunksize))
+    return pd.DataFrame(rows)
+
+
+def parse_band(text):
+    """'name=start-end' -> (name, (start, end))"""
+    name, bounds = text.split('=')
+    start, end = bounds.split('-')
+    return name, (float(start), float(end))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Band PFD for spectrometer CSV files")
+    parser.add_argument('inputs', nargs='+', help="CSV files or directories of CSV files")
+    parser.add_argument('--band', action='append', type=parse_band, default=[],
+                        help="extra band name=start-end (nm, inclusive); repeatable")
+    parser.add_argument('--only', action='store_true', help="report only the --band bands")
+    parser.add_argument('--factor', type=float, default=FACTOR)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--no-cache', action='store_true', help="parse the CSVs instead of using the spectral library")
+    parser.add_argument('--output', help="write the results table to this CSV")
+    args = parser.parse_args()
+
+    bands = dict(args.band) if args.only else {**BANDS, **dict(args.band)}
+    paths = collect_paths(args.inputs)
+    if not paths:
+        raise SystemExit("No spectrum files found")
+    library = None if args.no_cache else SpectralLibrary()
+    results = batch(paths, bands, args.factor, args.workers, library)
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"{len(results)} spectra -> {args.output}")
+    else:
+        print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,40 @@
+import os
+import sys
 import pandas as pd
 
-# Read the CSV file (note the first empty column will be automatically handled)
-df = pd.read_csv('export.csv')
+# `python csv_format.py` puts edenic_v1/ on the path, not the repo root the series package lives in
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
 
-# Rename the columns
-df.columns = ['', 'pH', 'Temperature', 'EC']
+from series.timestamps import to_epoch_ms
 
-# Save the modified full CSV
-df.to_csv('export_mod.csv', index=False)
+def format_export(input_path='export.csv', output_dir='.'):
+    """Rename the Bluelab export columns and split it into one file per parameter"""
+    # Read the CSV file (note the first empty column will be automatically handled)
+    df = pd.read_csv(input_path)
 
-# Create and save the three split files
-split_files = {
-    'pH': 'edenic1_ph.csv',
-    'Temperature': 'edenic1_temp.csv',
-    'EC': 'edenic1_ec.csv'
-}
+    # Bluelab's local "21/07/2025, 11:16" times (or already epoch ms) -> epoch ms
+    ms, valid = to_epoch_ms(df.iloc[:, 0].astype(str).to_numpy(), list(df.columns), 'bluelab')
+    df = df[valid].copy()
+    df[df.columns[0]] = ms[valid]
 
-for col, filename in split_files.items():
-    split_df = df[['', col]]
-    split_df.to_csv(filename, index=False)
\ No newline at end of file
+    # Rename the columns
+    df.columns = ['time', 'pH', 'Temperature', 'EC']
+
+    # Save the modified full CSV
+    df.to_csv(os.path.join(output_dir, 'export_mod.csv'), index=False)
+
+    # Create and save the three split files
+    split_files = {
+        'pH': 'edenic1_ph.csv',
+        'Temperature': 'edenic1_temp.csv',
+        'EC': 'edenic1_ec.csv'
+    }
+
+    for col, filename in split_files.items():
+        split_df = df[['time', col]]
+        split_df.to_csv(os.path.join(output_dir, filename), index=False)
+
+if __name__ == "__main__":
+    format_export()
\ No newline at end of file
@@ -6,13 +6,6 @@ import time
 API_KEY = os.environ.get('API_KEY')
 API_URL = os.environ.get('API_URL')
 
-if not API_KEY or not API_URL:
-    raise ValueError("Missing required tokens in environment variables.")
-
-headers = {
-    "Authorization": API_KEY
-}
-
 def get_timestamps_past_7_days():
     # Current time (end timestamp) in milliseconds
     end_ts = int(time.time() * 1000)
@@ -21,6 +14,12 @@ def get_timestamps_past_7_days():
     return start_ts, end_ts     # since Unix epoch 0:00:00 UTC Jan 1, 1970
 
 def fetch_telemetry():
+    if not API_KEY or not API_URL:
+        raise ValueError("Missing required tokens in environment variables.")
+
+    headers = {
+        "Authorization": API_KEY
+    }
     start_ts, end_ts = get_timestamps_past_7_days()
     
     params = {
@@ -0,0 +1,142 @@
+"""
+Frames/s and accuracy of CoverageEngine configurations against the original
+full-resolution cvtColor + inRange pipeline.
+
+    python -m feeding.bench_coverage                      # synthetic 640x480 frames
+    python -m feeding.bench_coverage --size 1920x1080
+    python -m feeding.bench_coverage --video tank.mp4 --roi 100,50,400,300
+    python -m feeding.bench_coverage --images captures/
+    python -m feeding.bench_coverage --bands 500         # one histogram vs 500 inRange passes
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from feeding.coverage import BandHistogram, CoverageEngine, build_lut
+
+
+def synthetic_frames(count, width, height, seed=0):
+    """Noisy water background with green algae blobs of varying density"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(count):
+        frame = rng.normal((120, 110, 90), 25, size=(height, width, 3)).clip(0, 255).astype(np.uint8)
+        for _ in range(rng.integers(5, 40)):
+            center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            radius = int(rng.integers(10, max(11, width // 8)))
+            color = tuple(int(c) for c in rng.integers((20, 100, 10), (90, 220, 80)))
+            cv2.circle(frame, center, radius, color, -1)
+        frames.append(cv2.GaussianBlur(frame, (5, 5), 0))
+    return frames
+
+
+def load_frames(args):
+    if args.images:
+        paths = sorted(p for ext in ('*.jpg', '*.jpeg', '*.png') for p in glob.glob(os.path.join(args.images, ext)))
+        frames = [cv2.imread(p) for p in paths[:args.frames]]
+        return [f for f in frames if f is not None]
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        frames = []
+        while len(frames) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        return frames
+    width, height = (int(v) for v in args.size.split('x'))
+    return synthetic_frames(args.frames, width, height)
+
+
+def measure(engine, frames, repeat):
+    results = [engine.coverage(f) for f in frames]  # warm-up and accuracy sample
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            engine.coverage(frame)
+    elapsed = time.perf_counter() - start
+    return len(frames) * repeat / elapsed, np.array(results)
+
+
+def sweep_boxes(count, seed=0):
+    """HSV boxes spread around the default algae box, as a threshold sweep would try"""
+    rng = np.random.default_rng(seed)
+    lower = np.clip(np.array(CoverageEngine().lower) + rng.integers(-20, 21, (count, 3)), 0, (179, 255, 255))
+    upper = np.clip(np.array(CoverageEngine().upper) + rng.integers(-40, 1, (count, 3)), lower, (179, 255, 255))
+    return lower, upper
+
+
+def measure_bands(frames, count):
+    """Seconds per frame for `count` boxes: separate inRange passes vs one histogram"""
+    lower, upper = sweep_boxes(count)
+    engines = [CoverageEngine(tuple(map(int, lo)), tuple(map(int, hi))) for lo, hi in zip(lower, upper)]
+    start = time.perf_counter()
+    direct = np.array([[e.coverage(f) for e in engines] for f in frames])
+    direct_s = (time.perf_counter() - start) / len(frames)
+
+    bands = BandHistogram()
+    start = time.perf_counter()
+    edges = bands.edges(lower, upper)
+    swept = np.array([bands.sweep(bands.table(f, edges=edges), lower, upper) for f in frames])
+    hist_s = (time.perf_counter() - start) / len(frames)
+    return direct_s, hist_s, np.abs(swept - direct)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark coverage engine configurations")
+    parser.add_argument('--images', help="directory of captured frames")
+    parser.add_argument('--video', help="recorded video file")
+    parser.add_argument('--size', default='640x480', help="synthetic frame size WxH")
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--roi', help="tank region x,y,w,h")
+    parser.add_argument('--bands', type=int, help="compare N thresholds: inRange each vs one histogram")
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    if not frames:
+        raise SystemExit("No frames to benchmark")
+    roi = tuple(int(v) for v in args.roi.split(',')) if args.roi else None
+    height, width = frames[0].shape[:2]
+    print(f"{len(frames)} frames of {width}x{height}, ROI {roi or 'full frame'}")
+
+    if args.bands:
+        direct_s, hist_s, error = measure_bands(frames, args.bands)
+        print(f"{args.bands} thresholds per frame: inRange {direct_s * 1000:.1f} ms, "
+              f"histogram {hist_s * 1000:.1f} ms ({direct_s / hist_s:.1f}x), "
+              f"mean err {error.mean():.3f}%, max err {error.max():.3f}%")
+        return
+
+    start = time.perf_counter()
+    build_lut(CoverageEngine().lower, CoverageEngine().upper)
+    print(f"LUT build: {(time.perf_counter() - start) * 1000:.0f} ms (once per HSV box)\n")
+
+    reference = CoverageEngine(method='hsv')
+    ref_fps, ref_values = measure(reference, frames, args.repeat)
+    roi_ref_values = measure(CoverageEngine(method='hsv', roi=roi), frames, 1)[1] if roi else ref_values
+
+    configs = [('hsv', 0, 'nearest', None), ('lut', 0, 'nearest', None)]
+    for downscale in (1, 2):
+        configs += [('hsv', downscale, 'nearest', None), ('lut', downscale, 'nearest', None),
+                    ('hsv', downscale, 'pyramid', None)]
+    if roi:
+        configs += [('hsv', 0, 'nearest', roi), ('lut', 0, 'nearest', roi), ('hsv', 1, 'nearest', roi)]
+
+    print(f"{'method':<6} {'scale':>5} {'resample':>8} {'roi':>4} {'fps':>9} {'speedup':>8} {'mean err':>9} {'max err':>8}")
+    for method, downscale, resample, config_roi in configs:
+        engine = CoverageEngine(method=method, downscale=downscale, resample=resample, roi=config_roi)
+        fps, values = measure(engine, frames, args.repeat)
+        # ROI runs are compared with the original method on the same region
+        truth = roi_ref_values if config_roi else ref_values
+        error = np.abs(values - truth)
+        print(f"{method:<6} {'1/' + str(2 ** downscale):>5} {resample:>8} {'yes' if config_roi else 'no':>4} "
+              f"{fps:>9.1f} {fps / ref_fps:>7.2f}x {error.mean():>8.3f}% {error.max():>7.3f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+def median_frame(frames):
+    """Per-pixel median of a list of frames; suppresses noise and flicker"""
+    if not frames:
+        return None
+    if len(frames) == 1:
+        return frames[0]
+    return np.median(np.stack(frames), axis=0).astype(np.uint8)
+
+
+class FrameGrabber:
+    """
+    Keeps a camera open and grabs frames on a background thread.
+
+    Every frame is grabbed so the driver queue never goes stale, but only up to
+    `store_fps` frames per second are decoded into a small ring buffer. Reads
+    return immediately from the buffer instead of reopening the device.
+    """
+
+    def __init__(self, source=0, buffer_size=5, store_fps=2.0, warmup_frames=30, reopen_delay=5.0):
+        self.source = source
+        self.store_interval = 1.0 / store_fps if store_fps else 0.0
+        self.warmup_frames = warmup_frames  # discarded while auto-exposure settles
+        self.reopen_delay = reopen_delay
+        self._frames = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._cap = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"grabber-{self.source}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self._release()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        for _ in range(self.warmup_frames):
+            if not cap.grab():
+                break
+        return cap
+
+    def _release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def _run(self):
+        last_store = 0.0
+        while not self._stop.is_set():
+            if self._cap is None:
+                self._cap = self._open()
+                if self._cap is None:
+                    print(f"Camera {self.source} unavailable, retrying in {self.reopen_delay:.0f}s")
+                    self._stop.wait(self.reopen_delay)
+                    continue
+
+            if not self._cap.grab():
+                print(f"Camera {self.source} stopped delivering frames, reopening")
+                self._release()
+                continue
+
+            now = time.time()
+            if now - last_store < self.store_interval:
+                continue
+            ret, frame = self._cap.retrieve()
+            if not ret:
+                continue
+            last_store = now
+            with self._cond:
+                self._frames.append((now, frame))
+                self._cond.notify_all()
+        self._release()
+
+    def wait_ready(self, timeout=10.0):
+        """Block until at least one frame is buffered"""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._frames) > 0, timeout=timeout)
+
+    def frames(self, count=None, max_age=None):
+        """Up to `count` newest buffered frames, oldest first"""
+        with self._cond:
+            items = list(self._frames)
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            items = [item for item in items if item[0] >= cutoff]
+        if count is not None:
+            items = items[-count:]
+        return [frame for _, frame in items]
+
+    def median_frame(self, count=5, max_age=None):
+        """Per-pixel median of the newest frames"""
+        return median_frame(self.frames(count, max_age))
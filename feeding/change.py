@@ -0,0 +1,67 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class ChangeDetector:
+    """
+    Decides whether a frame differs enough from the last analysed one to be
+    worth a full coverage pass.
+
+    Frames are reduced to an area-averaged colour thumbnail (which also
+    averages out sensor noise) and compared in two parts. The mean difference
+    is a uniform brightness shift (lights switched, sunrise); it invalidates
+    above `lighting_tolerance`, since the HSV box moves with brightness even
+    when the tank doesn't. What is left once that shift is removed is the
+    scene itself, reused while its mean absolute difference stays under
+    `tolerance` grey levels. Results older than `max_age` seconds are
+    recomputed anyway. check() leaves the cause in `reason`.
+    """
+
+    def __init__(self, size=(32, 24), tolerance=3.0, lighting_tolerance=2.0, max_age=3600, roi=None):
+        self.size = size
+        self.tolerance = tolerance
+        self.lighting_tolerance = lighting_tolerance
+        self.max_age = max_age
+        self.roi = roi
+        self.reason = None
+        self._reference = None
+        self._pending = None
+        self._result = None
+        self._stamp = 0.0
+
+    def thumbnail(self, frame):
+        if self.roi is not None:
+            x, y, w, h = self.roi
+            frame = frame[y:y + h, x:x + w]
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def _changed(self, thumb):
+        """'expired', 'lighting', 'scene' or None"""
+        if self._reference is None or time.time() - self._stamp > self.max_age:
+            return 'expired'
+        diff = thumb - self._reference
+        shift = float(diff.mean())
+        if abs(shift) > self.lighting_tolerance:
+            return 'lighting'
+        if float(np.abs(diff - shift).mean()) > self.tolerance:
+            return 'scene'
+        return None
+
+    def check(self, frame):
+        """True if the frame needs a fresh analysis; otherwise `result` still applies"""
+        self._pending = self.thumbnail(frame)
+        self.reason = self._changed(self._pending)
+        return self.reason is not None
+
+    def store(self, result):
+        """Remember the result computed for the frame last passed to check()"""
+        # Later frames are compared with the last analysed one, so slow drift still accumulates
+        self._reference = self._pending
+        self._result = result
+        self._stamp = time.time()
+
+    @property
+    def result(self):
+        return self._result
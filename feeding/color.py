@@ -1,139 +1,269 @@
-import cv2
-import numpy as np
+import asyncio
 import time
 from datetime import datetime, timedelta
-from prometheus_client import start_http_server, Gauge, Summary
-import schedule
+from prometheus_client import start_http_server, Counter, Gauge, Summary
 import math
+import os
+import sys
+
+# `python feeding/color.py` puts feeding/ on the path, not the repo root the package imports need
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from feeding.capture import FrameGrabber, median_frame
+from feeding.change import ChangeDetector
+from feeding.coverage import DEFAULT_BANDS, BandHistogram, CoverageEngine
+from feeding.history import ReadingLog
+from feeding.runtime import run_schedule
+from feeding.trend import StreamingTrend
 
 # ===== CUSTOMIZABLE PARAMETERS =====
 FEEDING_TIMES = ["05:00", "20:00"]  # AM/PM feeding schedule
 MONITOR_INTERVAL = 180  # minutes between checks
 BASE_FEED_DURATION = 5  # seconds (median feeding time)
 PUMP_PIN = 18  # GPIO pin
+CAMERA_SOURCE = 0  # device index or stream URL
+MEDIAN_FRAMES = 5  # buffered frames combined per reading
+HSV_LOWER = (30, 50, 50)  # algae colour box (OpenCV HSV)
+HSV_UPPER = (90, 255, 255)
+TANK_ROI = None  # (x, y, w, h) of the tank in the frame; None = full frame
+COVERAGE_DOWNSCALE = 1  # 2x reductions before thresholding (see feeding/bench_coverage.py)
+COVERAGE_METHOD = 'hsv'  # or 'lut'
+COVERAGE_BANDS = DEFAULT_BANDS  # colour classes reported from one histogram per reading; None = off
+CHANGE_TOLERANCE = 3.0  # mean abs thumbnail difference (grey levels, net of a uniform brightness shift) below which a reading is reused; 0 = always analyse
+CHANGE_MAX_AGE = 3600  # seconds before a reused reading is recomputed anyway
+TREND_WINDOWS = {'1h': 3600, '6h': 6 * 3600, '24h': 24 * 3600}  # seconds, tracked in parallel
+TREND_WINDOW = '24h'  # window used for feeding decisions
+HISTORY_RETENTION_DAYS = 90  # readings kept in feeding/history/<tank>.bin
+
+TANK_NAME = 'tank1'  # label on every metric; see feeding/tanks.py for several tanks
+METRICS_PORT = 8000
 
-# Prometheus Metrics
-COVERAGE = Gauge('algae_coverage', 'Current algae coverage percentage')
-FEED_DURATION = Summary('algae_feeding_duration', 'Feeding duration seconds')
-DAILY_TREND = Gauge('algae_daily_trend', 'Daily coverage trend coefficient')
+# Prometheus Metrics, one series per tank
+COVERAGE = Gauge('algae_coverage', 'Current algae coverage percentage', ['tank'])
+FEED_DURATION = Summary('algae_feeding_duration', 'Feeding duration seconds', ['tank'])
+DAILY_TREND = Gauge('algae_daily_trend', 'Daily coverage trend coefficient', ['tank'])
+BAND_COVERAGE = Gauge('algae_band_coverage', 'Coverage percentage per colour class', ['tank', 'band'])
+ANALYSES = Counter('algae_analyses', 'Coverage readings by outcome', ['tank', 'outcome'])
 # ===================================
 
+def default_tank():
+    """Single-tank configuration built from the constants above"""
+    return {
+        'name': TANK_NAME,
+        'camera': CAMERA_SOURCE,
+        'pump_pin': PUMP_PIN,
+        'hsv_lower': HSV_LOWER,
+        'hsv_upper': HSV_UPPER,
+        'roi': TANK_ROI,
+        'downscale': COVERAGE_DOWNSCALE,
+        'method': COVERAGE_METHOD,
+        'bands': COVERAGE_BANDS,
+        'change_tolerance': CHANGE_TOLERANCE,
+    }
+
+def feeding_duration(current_coverage, trend, base=BASE_FEED_DURATION):
+    """Pump seconds for a coverage reading and trend (% per hour)"""
+    # Formula: Base time adjusted by coverage and trend
+    coverage_factor = (50 - current_coverage) / 50  # +1 at 0%, -1 at 100%
+    trend_factor = 1 + math.tanh(trend)  # 0-2 range
+    
+    duration = base * (1 + coverage_factor) * trend_factor
+    return max(1, min(10, duration))  # Clamp 1-10 seconds
+
 class AlgaeSystem:
-    def __init__(self):
-        self.daily_readings = []
-        self.setup_metrics()
+    def __init__(self, tank=None, start_metrics=True, local_analysis=True):
+        self.tank = tank or default_tank()
+        self.local_analysis = local_analysis
+        self.name = self.tank['name']
+        self.pump_pin = self.tank['pump_pin']
+        self.trend = StreamingTrend(TREND_WINDOWS)
+        self.history = ReadingLog(self.name, retention_days=HISTORY_RETENTION_DAYS)
+        self.restore_trend()
+        self.pump_lock = asyncio.Lock()
+        if start_metrics:
+            self.setup_metrics()
         self.setup_hardware()
+        self.setup_camera()
         
     def setup_metrics(self):
-        start_http_server(8000)
+        start_http_server(METRICS_PORT)
         
     def setup_hardware(self):
         try:
             import RPi.GPIO as GPIO
             GPIO.setmode(GPIO.BCM)
-            GPIO.setup(PUMP_PIN, GPIO.OUT)
+            GPIO.setup(self.pump_pin, GPIO.OUT)
             self.hardware_ready = True
         except:
-            print("Running in simulation mode")
+            print(f"{self.name}: running in simulation mode")
             self.hardware_ready = False
 
-    def get_coverage(self):
-        """Analyze current algae density"""
-        cap = cv2.VideoCapture(0)
-        ret, frame = cap.read()
-        if not ret: return None
-        
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        mask = cv2.inRange(hsv, (30, 50, 50), (90, 255, 255))
-        coverage = np.count_nonzero(mask) / mask.size * 100
-        cap.release()
+    def setup_camera(self, wait=15):
+        # Kept open for the lifetime of the system; frames arrive in the background
+        self.camera = FrameGrabber(self.tank['camera']).start()
+        params = self.engine_params()
+        self.coverage_engine = self.band_histogram = None
+        if self.local_analysis:
+            # Pool workers (feeding/tanks.py) keep their own engines; a LUT engine is ~16 MB
+            self.coverage_engine = CoverageEngine(**params)
+            if self.tank['bands']:
+                self.band_histogram = BandHistogram(self.tank['bands'], roi=params['roi'],
+                                                    downscale=params['downscale'])
+        self.change_detector = None
+        if self.tank['change_tolerance']:
+            self.change_detector = ChangeDetector(tolerance=self.tank['change_tolerance'],
+                                                  max_age=CHANGE_MAX_AGE, roi=params['roi'])
+        if wait and not self.camera.wait_ready(timeout=wait):
+            print(f"⚠️ {self.name}: no frames from camera {self.tank['camera']} yet")
+
+    def engine_params(self):
+        """CoverageEngine arguments for this tank (picklable, for pool workers)"""
+        return {
+            'lower': tuple(self.tank['hsv_lower']),
+            'upper': tuple(self.tank['hsv_upper']),
+            'roi': tuple(self.tank['roi']) if self.tank['roi'] else None,
+            'downscale': self.tank['downscale'],
+            'method': self.tank['method'],
+        }
+
+    def restore_trend(self):
+        """Refill the trend windows from stored readings after a restart"""
+        t, coverage = self.history.load(since=time.time() - max(TREND_WINDOWS.values()))
+        for ts, value in zip(t.tolist(), coverage.tolist()):
+            self.trend.add(ts, value)
+        if t.size:
+            print(f"{self.name}: restored {t.size} readings from {self.history.path}")
+
+    def shutdown(self):
+        self.camera.stop()
+        self.history.close()
+
+    def latest_frames(self):
+        """Newest buffered frames to combine into one reading"""
+        return self.camera.frames(MEDIAN_FRAMES, max_age=60)
+
+    def record_coverage(self, coverage, bands=None):
+        """Feed a reading into the trend and the coverage gauges"""
+        if coverage is None: return None
+        for band, value in (bands or {}).items():
+            BAND_COVERAGE.labels(tank=self.name, band=band).set(value)
         
-        # Store daily readings (resets at midnight)
-        if not self.daily_readings or datetime.now().day != self.daily_readings[-1]['day']:
-            self.daily_readings = []
-        self.daily_readings.append({
-            'time': datetime.now(),
-            'day': datetime.now().day,
-            'value': coverage
-        })
+        # Sliding-window regression; no reset at midnight
+        now = time.time()
+        self.trend.add(now, coverage)
+        self.history.append(now, coverage)
+        COVERAGE.labels(tank=self.name).set(coverage)
         
         return coverage
 
-    def calculate_daily_trend(self):
-        """Calculate linear regression slope of today's readings"""
-        if len(self.daily_readings) < 2: return 0
-        
-        x = [(r['time'] - self.daily_readings[0]['time']).total_seconds() for r in self.daily_readings]
-        y = [r['value'] for r in self.daily_readings]
-        
-        # Linear regression
-        n = len(x)
-        sum_x = sum(x)
-        sum_y = sum(y)
-        sum_xy = sum(xi*yi for xi,yi in zip(x,y))
-        sum_x2 = sum(xi**2 for xi in x)
-        
-        slope = (n*sum_xy - sum_x*sum_y) / (n*sum_x2 - sum_x**2)
-        return slope * 3600  # Convert to % per hour
+    def measure(self, frame):
+        """(coverage, {band: coverage}) of one frame"""
+        if not self.band_histogram:
+            return self.coverage_engine.coverage(frame), {}
+        # One HSV conversion shared by the exact box and the band histogram
+        hsv = self.coverage_engine.hsv(frame)
+        return self.coverage_engine.coverage(frame, hsv), self.band_histogram.coverage(frame, hsv)
 
-    def calculate_feeding_duration(self, current_coverage):
-        """Dynamic duration based on daily trend and current density"""
-        trend = self.calculate_daily_trend()
-        DAILY_TREND.set(trend)
-        
-        # Formula: Base time adjusted by coverage and trend
-        coverage_factor = (50 - current_coverage) / 50  # +1 at 0%, -1 at 100%
-        trend_factor = 1 + math.tanh(trend)  # 0-2 range
+    def needs_analysis(self, frame):
+        """False when the scene matches the last analysed frame and its reading can be reused"""
+        if self.change_detector is None:
+            return True
+        changed = self.change_detector.check(frame)
+        # Lighting changes are counted apart from scene changes
+        outcome = 'lighting' if self.change_detector.reason == 'lighting' else 'analysed' if changed else 'reused'
+        ANALYSES.labels(tank=self.name, outcome=outcome).inc()
+        return changed
+
+    def analyze(self):
+        """(coverage, {band: coverage}) of the buffered frames (blocking; the async cycles run it in a thread)"""
+        frames = self.latest_frames()
+        if not frames: return None, {}
         
-        duration = BASE_FEED_DURATION * (1 + coverage_factor) * trend_factor
-        return max(1, min(10, duration))  # Clamp 1-10 seconds
+        # The newest frame decides reuse (as in feeding/tanks.py); only fresh readings pay for the median
+        if not self.needs_analysis(frames[-1]):
+            return self.change_detector.result
+        result = self.measure(median_frame(frames))
+        if self.change_detector:
+            self.change_detector.store(result)
+        return result
 
-    def execute_feeding(self, duration):
-        """Run pump for calculated duration"""
-        if self.hardware_ready:
-            import RPi.GPIO as GPIO
-            GPIO.output(PUMP_PIN, GPIO.HIGH)
-            time.sleep(duration)
-            GPIO.output(PUMP_PIN, GPIO.LOW)
-        FEED_DURATION.observe(duration)
+    def get_coverage(self):
+        """Analyze current algae density"""
+        return self.record_coverage(*self.analyze())
+
+    async def read_coverage(self):
+        """get_coverage without blocking the event loop"""
+        coverage, bands = await asyncio.get_running_loop().run_in_executor(None, self.analyze)
+        return self.record_coverage(coverage, bands)
+
+    def calculate_daily_trend(self, window=TREND_WINDOW):
+        """Linear regression slope (% per hour) over a sliding window"""
+        return self.trend.slope(window)
+
+    def calculate_feeding_duration(self, current_coverage, window=TREND_WINDOW):
+        """Dynamic duration based on coverage trend and current density"""
+        trend = self.calculate_daily_trend(window)
+        DAILY_TREND.labels(tank=self.name).set(trend)
+        return feeding_duration(current_coverage, trend)
+
+    async def execute_feeding(self, duration):
+        """Run pump for calculated duration; the loop keeps serving other jobs meanwhile"""
+        async with self.pump_lock:
+            if self.hardware_ready:
+                import RPi.GPIO as GPIO
+                GPIO.output(self.pump_pin, GPIO.HIGH)
+                try:
+                    await asyncio.sleep(duration)
+                finally:
+                    # also on cancellation, so a shutdown mid-feed never leaves the pump running
+                    GPIO.output(self.pump_pin, GPIO.LOW)
+        FEED_DURATION.labels(tank=self.name).observe(duration)
         return duration
 
-    def monitoring_cycle(self):
+    async def monitoring_cycle(self):
         """Regular density check without feeding"""
-        coverage = self.get_coverage()
+        coverage = await self.read_coverage()
         if coverage is not None:
-            COVERAGE.set(coverage)
-            print(f"{datetime.now():%H:%M} - Coverage: {coverage:.1f}%")
+            print(f"{datetime.now():%H:%M} - {self.name} coverage: {coverage:.1f}%")
 
-    def feeding_cycle(self):
+    async def feeding_cycle(self):
         """Scheduled feeding with dynamic duration"""
-        coverage = self.get_coverage()
+        coverage = await self.read_coverage()
         if coverage is None: return
         
+        await self.feed(coverage)
+
+    async def feed(self, coverage):
         duration = self.calculate_feeding_duration(coverage)
-        actual_duration = self.execute_feeding(duration)
+        actual_duration = await self.execute_feeding(duration)
         
-        print(f"{datetime.now():%H:%M} - Fed {actual_duration:.1f}s (Cov: {coverage:.1f}%)")
+        print(f"{datetime.now():%H:%M} - {self.name} fed {actual_duration:.1f}s (Cov: {coverage:.1f}%)")
 
-    def run(self):
+    async def run_async(self):
         # Initial reading
-        self.monitoring_cycle()
-        
-        # Schedule feedings
-        for time_str in FEEDING_TIMES:
-            schedule.every().day.at(time_str).do(self.feeding_cycle)
-        
-        # Schedule monitoring
-        schedule.every(MONITOR_INTERVAL).minutes.do(self.monitoring_cycle)
+        await self.monitoring_cycle()
         
         print("Algae monitoring system started")
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        await run_schedule(FEEDING_TIMES, self.feeding_cycle, MONITOR_INTERVAL * 60, self.monitoring_cycle)
 
-if __name__ == "__main__":
-    system = AlgaeSystem()
+    def run(self):
+        asyncio.run(self.run_async())
+
+def main(tanks=None):
+    if tanks:
+        # Several cameras/pumps from a JSON config, analysed in a process pool
+        from feeding.tanks import TankLine
+        system = TankLine.from_config(tanks)
+    else:
+        system = AlgaeSystem()
     try:
         system.run()
     except KeyboardInterrupt:
         print("System stopped")
+    finally:
+        system.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import cv2
+import numpy as np
+
+DEFAULT_LOWER = (30, 50, 50)
+DEFAULT_UPPER = (90, 255, 255)
+
+_LUT_CACHE = {}
+_ENGINES = {}  # per-process engines for pool workers (cached_engine)
+
+
+def build_lut(lower, upper):
+    """
+    uint8 mask lookup table over every 24-bit colour, indexed by the packed
+    pixel value b | g << 8 | r << 16. Built once per HSV box (~16 MB).
+    """
+    key = (tuple(lower), tuple(upper))
+    if key not in _LUT_CACHE:
+        packed = np.arange(1 << 24, dtype=np.uint32)
+        bgr = np.empty((4096, 4096, 3), dtype=np.uint8)
+        bgr[..., 0] = (packed & 0xFF).reshape(4096, 4096)
+        bgr[..., 1] = ((packed >> 8) & 0xFF).reshape(4096, 4096)
+        bgr[..., 2] = (packed >> 16).reshape(4096, 4096)
+        hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+        _LUT_CACHE[key] = cv2.inRange(hsv, tuple(lower), tuple(upper)).ravel()
+    return _LUT_CACHE[key]
+
+
+class CoverageEngine:
+    """
+    Percentage of tank pixels inside an HSV box.
+
+    roi:       (x, y, w, h) of the tank in the frame, or None for the full frame
+    downscale: number of 2x reductions before thresholding
+    resample:  'nearest' keeps every other pixel, an unbiased sample of the
+               pixel colours; 'pyramid' uses cv2.pyrDown, which blurs algae
+               edges into the water colour and is slower
+    method:    'hsv' converts and thresholds like the original get_coverage;
+               'lut' maps each packed BGR pixel straight to in/out through a
+               precomputed table, skipping the HSV conversion entirely
+    """
+
+    def __init__(self, lower=DEFAULT_LOWER, upper=DEFAULT_UPPER, roi=None, downscale=0,
+                 resample='nearest', method='hsv'):
+        if method not in ('hsv', 'lut'):
+            raise ValueError(f"Unknown coverage method: {method}")
+        if resample not in ('nearest', 'pyramid'):
+            raise ValueError(f"Unknown resample mode: {resample}")
+        self.lower = tuple(lower)
+        self.upper = tuple(upper)
+        self.roi = roi
+        self.downscale = downscale
+        self.resample = resample
+        self.method = method
+        self._lut = build_lut(self.lower, self.upper) if method == 'lut' else None
+
+    def prepare(self, frame):
+        """Crop to the tank and shrink; the result is what gets thresholded"""
+        if self.roi is not None:
+            x, y, w, h = self.roi
+            frame = frame[y:y + h, x:x + w]
+        if self.downscale and self.resample == 'nearest':
+            scale = 0.5 ** self.downscale
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+        elif self.downscale:
+            for _ in range(self.downscale):
+                frame = cv2.pyrDown(frame)
+        return frame
+
+    def hsv(self, frame):
+        """HSV of the prepared frame, shareable with BandHistogram"""
+        return cv2.cvtColor(self.prepare(frame), cv2.COLOR_BGR2HSV)
+
+    def mask(self, frame, hsv=None):
+        """uint8 mask (255 = inside the HSV box) of the prepared frame; hsv reuses a converted frame"""
+        if self.method == 'hsv':
+            return cv2.inRange(self.hsv(frame) if hsv is None else hsv, self.lower, self.upper)
+        # BGRA viewed as little-endian uint32 is b | g << 8 | r << 16 | a << 24
+        packed = cv2.cvtColor(self.prepare(frame), cv2.COLOR_BGR2BGRA).view(np.uint32)[..., 0]
+        return self._lut[packed & 0xFFFFFF]
+
+    def coverage(self, frame, hsv=None):
+        mask = self.mask(frame, hsv)
+        return cv2.countNonZero(mask) / mask.size * 100
+
+
+HSV_RANGES = (180, 256, 256)
+DEFAULT_BANDS = {
+    'algae': (DEFAULT_LOWER, DEFAULT_UPPER),
+    'yellowing': ((15, 50, 50), (29, 255, 255)),
+    'debris': ((0, 0, 0), (179, 255, 40)),
+}
+
+
+class BandHistogram:
+    """
+    Coverage of many HSV boxes from one pass over the frame.
+
+    Each frame is reduced to a 3D HSV histogram and its summed-volume table;
+    the pixel count inside any box is then an inclusion-exclusion over eight
+    corners, so extra colour classes or a threshold sweep cost a table lookup
+    instead of another inRange. The bin edges on each axis are the box bounds
+    themselves (every lower and upper + 1), so counts match inRange exactly
+    and the table only grows with the number of distinct thresholds: a few
+    cells for the configured bands, at most full HSV resolution for a sweep.
+    """
+
+    def __init__(self, bands=None, roi=None, downscale=0, resample='nearest'):
+        self.bands = dict(DEFAULT_BANDS if bands is None else bands)
+        self._engine = CoverageEngine(roi=roi, downscale=downscale, resample=resample)
+        names = list(self.bands)
+        self._lowers = np.array([self.bands[n][0] for n in names])
+        self._uppers = np.array([self.bands[n][1] for n in names])
+        self._edges = self.edges(self._lowers, self._uppers)
+
+    @staticmethod
+    def edges(lowers, uppers):
+        """Per-axis sorted bin edges, 0 and the channel range included, at every bound of the boxes"""
+        lo = np.clip(np.atleast_2d(lowers), 0, HSV_RANGES)
+        hi = np.clip(np.atleast_2d(uppers) + 1, 0, HSV_RANGES)
+        return tuple(np.unique(np.concatenate(([0, size], lo[:, axis], hi[:, axis]))).astype(np.intp)
+                     for axis, size in enumerate(HSV_RANGES))
+
+    def table(self, frame, hsv=None, edges=None):
+        """
+        (edges, summed-volume table) of a frame's HSV histogram over `edges`
+        (default: the configured bands'); table[i, j, k] counts pixels below
+        edges[0][i], edges[1][j] and edges[2][k]. hsv reuses a converted frame.
+        """
+        edges = self._edges if edges is None else edges
+        if hsv is None:
+            hsv = self._engine.hsv(frame)
+        shape = tuple(len(e) - 1 for e in edges)
+        # channel value -> bin index (< 256 bins per axis), one lookup table per channel
+        lut = np.stack([np.searchsorted(e, np.arange(256), side='right') - 1 for e in edges], axis=1)
+        bins = cv2.LUT(hsv, lut.astype(np.uint8).reshape(1, 256, 3))
+        hist = cv2.calcHist([bins], [0, 1, 2], None, list(shape), [0, shape[0], 0, shape[1], 0, shape[2]])
+        sat = np.zeros(tuple(n + 1 for n in shape), dtype=np.int64)
+        sat[1:, 1:, 1:] = hist
+        for axis in range(3):
+            np.cumsum(sat, axis=axis, out=sat)
+        return edges, sat
+
+    def sweep(self, table, lowers, uppers):
+        """Coverage % for arrays of inclusive (n, 3) lower/upper HSV bounds; every bound must be in the table's edges"""
+        edges, sat = table
+        lo = np.clip(np.atleast_2d(lowers), 0, HSV_RANGES)
+        hi = np.clip(np.atleast_2d(uppers) + 1, 0, HSV_RANGES)
+        lo, hi = np.broadcast_arrays(lo, np.maximum(hi, lo))
+        lo_idx = np.stack([np.searchsorted(edges[axis], lo[:, axis]) for axis in range(3)], axis=1)
+        hi_idx = np.stack([np.searchsorted(edges[axis], hi[:, axis]) for axis in range(3)], axis=1)
+        for idx, bound in ((lo_idx, lo), (hi_idx, hi)):
+            if any((np.take(edges[axis], idx[:, axis], mode='clip') != bound[:, axis]).any() for axis in range(3)):
+                raise ValueError("sweep bounds are not bin edges of this table; build it with edges(lowers, uppers)")
+        count = np.zeros(len(lo), dtype=np.int64)
+        for corner in range(8):
+            pick = np.array([(corner >> axis) & 1 for axis in range(3)], dtype=bool)
+            sign = -1 if (3 - pick.sum()) % 2 else 1
+            idx = np.where(pick, hi_idx, lo_idx)
+            count += sign * sat[idx[:, 0], idx[:, 1], idx[:, 2]]
+        return count / sat[-1, -1, -1] * 100
+
+    def coverage(self, frame, hsv=None):
+        """{band: coverage %} for every configured band"""
+        values = self.sweep(self.table(frame, hsv), self._lowers, self._uppers)
+        return dict(zip(self.bands, values.tolist()))
+
+
+def cached_engine(params):
+    """This process's CoverageEngine for a parameter dict, built on first use"""
+    key = tuple(sorted(params.items()))
+    if key not in _ENGINES:
+        _ENGINES[key] = CoverageEngine(**params)
+    return _ENGINES[key]
+
+
+def analyze_frames(frames, params, bands=None):
+    """
+    Median-combine buffered frames and return (coverage, {band: coverage}).
+    Meant to run in pool workers: each process keeps one engine (and LUT) per
+    parameter set.
+    """
+    if not frames:
+        return None, {}
+    engine = cached_engine(params)
+    frame = frames[0] if len(frames) == 1 else np.median(np.stack(frames), axis=0).astype(np.uint8)
+    band_coverage, hsv = {}, None
+    if bands:
+        histogram = BandHistogram(bands, roi=engine.roi, downscale=engine.downscale, resample=engine.resample)
+        hsv = engine.hsv(frame)
+        band_coverage = histogram.coverage(frame, hsv)
+    return engine.coverage(frame, hsv), band_coverage
@@ -0,0 +1,116 @@
+"""
+On-disk coverage history, one compact binary log per tank.
+
+Each reading is a fixed 16-byte record (epoch seconds, coverage %) appended
+to feeding/history/<tank>.bin, so a restart reloads the trend windows by
+memory-mapping the file instead of parsing anything. Records older than the
+retention period are dropped when the log is opened.
+
+    python iot_grafana.py feeding-export --tank tank1 --output algae_tank1.csv
+    python iot_grafana.py feeding-export --tank tank1 --sink influx --days 7
+"""
+import os
+import time
+
+import numpy as np
+
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history')
+RETENTION_DAYS = 90
+RECORD = np.dtype([('t', '<f8'), ('coverage', '<f8')])
+
+
+class ReadingLog:
+    def __init__(self, name, directory=HISTORY_DIR, retention_days=RETENTION_DAYS):
+        self.name = name
+        self.path = os.path.join(directory, f"{name}.bin")
+        self.retention_days = retention_days
+        os.makedirs(directory, exist_ok=True)
+        self._repair()
+        if retention_days:
+            self.compact()
+        self._file = open(self.path, 'ab')
+
+    def _repair(self):
+        """Drop a partial record left by a crash mid-write"""
+        if os.path.exists(self.path):
+            size = os.path.getsize(self.path)
+            if size % RECORD.itemsize:
+                os.truncate(self.path, size - size % RECORD.itemsize)
+
+    def records(self):
+        """Memory-mapped view of every record (read-only), oldest first"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return np.empty(0, dtype=RECORD)
+        return np.memmap(self.path, dtype=RECORD, mode='r')
+
+    def load(self, since=None, until=None):
+        """(t, coverage) arrays, optionally limited to epoch seconds [since, until)"""
+        records = self.records()
+        lo = np.searchsorted(records['t'], since) if since is not None else 0
+        hi = np.searchsorted(records['t'], until) if until is not None else len(records)
+        selected = records[lo:hi]
+        return np.array(selected['t']), np.array(selected['coverage'])
+
+    def append(self, t, coverage):
+        self._file.write(np.array([(t, coverage)], dtype=RECORD).tobytes())
+        self._file.flush()
+
+    def compact(self, now=None):
+        """Rewrite the log without records older than the retention period"""
+        records = self.records()
+        cutoff = (now or time.time()) - self.retention_days * 86400
+        if not len(records) or records['t'][0] >= cutoff:
+            return 0
+        keep = np.array(records[np.searchsorted(records['t'], cutoff):])
+        dropped = len(records) - len(keep)
+        del records
+        tmp = f"{self.path}.tmp"
+        keep.tofile(tmp)
+        os.replace(tmp, self.path)
+        return dropped
+
+    def close(self):
+        self._file.close()
+
+
+def export_csv(t, coverage, output):
+    import pandas as pd
+
+    pd.DataFrame({'time': np.round(t * 1000).astype(np.int64), 'coverage': coverage}).to_csv(
+        output, index=False, float_format='%.4f')
+    print(f"✅ {len(t)} readings written to {output}")
+
+
+def export_influx(name, t, coverage):
+    """Write readings as algae_coverage points tagged by tank (configured from .env)"""
+    url, token = os.getenv('INFLUXDB_URL'), os.getenv('INFLUXDB_TOKEN')
+    if not all([url, token]):
+        print("❌ InfluxDB not configured (INFLUXDB_URL / INFLUXDB_TOKEN)")
+        return False
+    from influxdb_client import InfluxDBClient, Point, WritePrecision
+    from influxdb_client.client.write_api import SYNCHRONOUS
+
+    org = os.getenv('INFLUXDB_ORG', 'tuya')
+    bucket = os.getenv('INFLUXDB_BUCKET', 'iot_devices')
+    points = [Point('algae_coverage').tag('tank', name).field('coverage', float(value))
+              .time(int(round(ts * 1000)), WritePrecision.MS) for ts, value in zip(t, coverage)]
+    with InfluxDBClient(url=url, token=token, org=org) as client:
+        client.write_api(write_options=SYNCHRONOUS).write(bucket=bucket, org=org, record=points)
+    print(f"✅ {len(points)} readings written to InfluxDB bucket {bucket}")
+    return True
+
+
+def export(tank, target='csv', output=None, days=None):
+    """Export a tank's stored readings to a CSV file or InfluxDB"""
+    if not os.path.exists(os.path.join(HISTORY_DIR, f"{tank}.bin")):
+        print(f"❌ No history for {tank} in {HISTORY_DIR}")
+        return 1
+    log = ReadingLog(tank, retention_days=None)
+    try:
+        t, coverage = log.load(since=time.time() - days * 86400 if days else None)
+    finally:
+        log.close()
+    if target == 'influx':
+        return 0 if export_influx(tank, t, coverage) else 1
+    export_csv(t, coverage, output or f"algae_{tank}.csv")
+    return 0
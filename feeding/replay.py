@@ -0,0 +1,192 @@
+"""
+Offline replay of the coverage pipeline over recorded footage, for tuning the
+HSV box and BASE_FEED_DURATION without waiting days for live readings.
+
+    python iot_grafana.py replay captures/ --output replay.csv
+    python iot_grafana.py replay tank.mp4 --every 300 --hsv-lower 35,60,40 --feedings feedings.csv
+    python iot_grafana.py replay day1.mp4 day2.mp4 --start 2025-07-21T06:00 --output replay.parquet
+
+Inputs are image directories/files (timestamped from the file name with
+--time-format, else the file mtime) and video files (timestamped from --start,
+else mtime minus duration, plus the frame position). Work is split into
+segments that are decoded and analysed in parallel worker processes.
+
+The coverage series is written as CSV or Parquet (by extension) with epoch-ms
+times, and the feeding schedule is simulated on it with the live trend
+window and duration formula.
+"""
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from feeding.color import (BASE_FEED_DURATION, COVERAGE_DOWNSCALE, COVERAGE_METHOD, FEEDING_TIMES, HSV_LOWER,
+                           HSV_UPPER, MONITOR_INTERVAL, TANK_ROI, TREND_WINDOW, TREND_WINDOWS, feeding_duration)
+from feeding.coverage import cached_engine
+from feeding.trend import StreamingTrend
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.h264')
+IMAGES_PER_TASK = 64
+
+
+def image_time(path, time_format=None):
+    """Epoch seconds of a capture, from its file name if a format is given"""
+    if time_format:
+        try:
+            return datetime.strptime(os.path.splitext(os.path.basename(path))[0], time_format).timestamp()
+        except ValueError:
+            pass
+    return os.path.getmtime(path)
+
+
+def collect_inputs(inputs):
+    """Split inputs into image paths and video paths"""
+    images, videos = [], []
+    for item in inputs:
+        paths = sorted(glob.glob(os.path.join(item, '*'))) if os.path.isdir(item) else [item]
+        for path in paths:
+            ext = os.path.splitext(path)[1].lower()
+            if ext in IMAGE_EXTENSIONS:
+                images.append(path)
+            elif ext in VIDEO_EXTENSIONS:
+                videos.append(path)
+    return images, videos
+
+
+def video_tasks(path, every, segments, start=None):
+    """Frame-range tasks covering a video, sampling one frame per `every` seconds"""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if total <= 0:
+        print(f"⚠️ {path}: cannot read frame count, skipped")
+        return []
+    t0 = start if start is not None else os.path.getmtime(path) - total / fps
+    step = max(1, int(round(every * fps)))
+    positions = np.arange(0, total, step)
+    return [('video', path, t0, fps, chunk.tolist()) for chunk in np.array_split(positions, segments) if chunk.size]
+
+
+def analyze_task(task, params):
+    """Decode and analyse one segment; returns (epoch seconds, coverage) pairs"""
+    # One engine per worker process, reused by all its tasks
+    engine = cached_engine(params)
+    kind, *rest = task
+    results = []
+    if kind == 'images':
+        for path, ts in rest[0]:
+            frame = cv2.imread(path)
+            if frame is not None:
+                results.append((ts, engine.coverage(frame)))
+        return results
+
+    path, t0, fps, positions = rest
+    cap = cv2.VideoCapture(path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, positions[0])
+    current = positions[0]
+    for pos in positions:
+        # Short gaps are cheaper to grab through than to seek
+        if pos - current > 2 * fps:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
+            current = pos
+        while current < pos and cap.grab():
+            current += 1
+        ret, frame = cap.read()
+        current += 1
+        if not ret:
+            break
+        results.append((t0 + pos / fps, engine.coverage(frame)))
+    cap.release()
+    return results
+
+
+def simulate_feedings(series, feeding_times=FEEDING_TIMES, window=TREND_WINDOW, base=BASE_FEED_DURATION,
+                      max_delay=MONITOR_INTERVAL * 60):
+    """Replay the feeding schedule: at each feeding time use the latest reading and trend"""
+    trend = StreamingTrend(TREND_WINDOWS)
+    slots = [tuple(int(v) for v in t.split(':')) for t in feeding_times]
+    feedings = []
+    next_feed = None
+    for ts_ms, coverage in zip(series['time'].to_numpy(), series['coverage'].to_numpy()):
+        now = datetime.fromtimestamp(ts_ms / 1000)
+        if next_feed is None:
+            next_feed = next_slot(now, slots)
+        while now >= next_feed:
+            # The live system reads the camera at feeding time; the first frame after it
+            # stands in, unless the footage has a gap there
+            if (now - next_feed).total_seconds() <= max_delay:
+                slope = trend.slope(window)
+                feedings.append((int(next_feed.timestamp() * 1000), coverage, slope,
+                                 feeding_duration(coverage, slope, base)))
+            next_feed = next_slot(next_feed + timedelta(seconds=1), slots)
+        trend.add(ts_ms / 1000, coverage)
+    return pd.DataFrame(feedings, columns=['time', 'coverage', 'trend', 'duration'])
+
+
+def next_slot(after, slots):
+    candidates = [after.replace(hour=h, minute=m, second=0, microsecond=0) + timedelta(days=d)
+                  for d in (0, 1) for h, m in slots]
+    return min(c for c in candidates if c >= after)
+
+
+def write_table(table, path):
+    if path.endswith('.parquet'):
+        table.to_parquet(path, index=False)  # needs pyarrow or fastparquet
+    else:
+        table.to_csv(path, index=False, float_format='%.4f')
+
+
+def main(inputs, output='replay.csv', feedings=None, every=60.0, start=None, time_format=None,
+         hsv_lower=HSV_LOWER, hsv_upper=HSV_UPPER, roi=TANK_ROI, downscale=COVERAGE_DOWNSCALE,
+         method=COVERAGE_METHOD, base_duration=BASE_FEED_DURATION, workers=None):
+    images, videos = collect_inputs(inputs)
+    if not images and not videos:
+        print("❌ No images or videos found")
+        return 1
+    workers = workers or os.cpu_count() or 1
+    start_ts = datetime.fromisoformat(start).timestamp() if start else None
+
+    tasks = []
+    if images:
+        stamped = [(path, image_time(path, time_format)) for path in images]
+        tasks += [('images', stamped[i:i + IMAGES_PER_TASK]) for i in range(0, len(stamped), IMAGES_PER_TASK)]
+    for path in videos:
+        tasks += video_tasks(path, every, workers, start_ts)
+        if start_ts is not None:
+            # consecutive recordings: the next one starts where this one ends
+            cap = cv2.VideoCapture(path)
+            start_ts += cap.get(cv2.CAP_PROP_FRAME_COUNT) / (cap.get(cv2.CAP_PROP_FPS) or 30.0)
+            cap.release()
+
+    params = {'lower': tuple(hsv_lower), 'upper': tuple(hsv_upper), 'roi': tuple(roi) if roi else None,
+              'downscale': downscale, 'method': method}
+    began = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = [r for chunk in pool.map(analyze_task, tasks, [params] * len(tasks)) for r in chunk]
+    elapsed = time.perf_counter() - began
+    if not results:
+        print("❌ No frames could be decoded")
+        return 1
+
+    series = pd.DataFrame(results, columns=['time', 'coverage']).sort_values('time', kind='stable')
+    series['time'] = (series['time'] * 1000).round().astype(np.int64)
+    write_table(series, output)
+    print(f"✅ {len(series)} frames in {elapsed:.1f}s ({len(series) / elapsed:.1f} fps, {workers} workers) -> {output}")
+    print(f"   coverage mean {series['coverage'].mean():.1f}%, "
+          f"min {series['coverage'].min():.1f}%, max {series['coverage'].max():.1f}%")
+
+    fed = simulate_feedings(series, base=base_duration)
+    if not fed.empty:
+        days = max(1.0, (series['time'].iloc[-1] - series['time'].iloc[0]) / 86400000)
+        print(f"   {len(fed)} simulated feedings, {fed['duration'].mean():.1f}s average, "
+              f"{fed['duration'].sum() / days:.1f}s per day")
+        if feedings:
+            write_table(fed, feedings)
+    return 0
@@ -0,0 +1,65 @@
+"""
+asyncio scheduling for the feeding loop. Jobs sleep until their exact next
+wall-clock time instead of polling every second, and each run is started as
+its own task, so a feed in progress never delays a monitoring reading.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+
+def next_daily(at, now=None):
+    """Next datetime for a "HH:MM" daily slot"""
+    now = now or datetime.now()
+    hour, minute = (int(v) for v in at.split(':'))
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return target if target > now else target + timedelta(days=1)
+
+
+async def sleep_until(target):
+    """Sleep to a wall-clock datetime, re-checking so clock adjustments don't fire early"""
+    while True:
+        remaining = (target - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(remaining, 3600))
+
+
+def spawn(job, tasks):
+    """Start a coroutine job without awaiting it; failures are reported, not raised"""
+    task = asyncio.create_task(job())
+    tasks.add(task)
+
+    def finished(t):
+        tasks.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            print(f"⚠️ {getattr(job, '__name__', job)} failed: {t.exception()!r}")
+
+    task.add_done_callback(finished)
+
+
+async def daily(at, job, tasks):
+    while True:
+        await sleep_until(next_daily(at))
+        spawn(job, tasks)
+
+
+async def every(seconds, job, tasks):
+    # Fixed-rate on the monotonic clock; a slow run doesn't push later ones back
+    next_run = time.monotonic() + seconds
+    while True:
+        await asyncio.sleep(max(0.0, next_run - time.monotonic()))
+        next_run += seconds
+        spawn(job, tasks)
+
+
+async def run_schedule(feeding_times, feed, interval, monitor):
+    """Run feed() at each daily time and monitor() every `interval` seconds, forever"""
+    tasks = set()
+    loops = [daily(at, feed, tasks) for at in feeding_times] + [every(interval, monitor, tasks)]
+    try:
+        await asyncio.gather(*loops)
+    finally:
+        for task in list(tasks):
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
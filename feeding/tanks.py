@@ -0,0 +1,114 @@
+"""
+Several tanks on one Pi or server: each tank has its own camera (device index
+or stream URL), pump pin and HSV box, and readings from all cameras are
+analysed in parallel in a process pool.
+
+    python iot_grafana.py feeding --tanks feeding/tanks.example.json
+
+Config:
+
+    {"tanks": [{"name": "tank1", "camera": 0, "pump_pin": 18,
+                "hsv_lower": [30, 50, 50], "hsv_upper": [90, 255, 255],
+                "bands": {"algae": [[30, 50, 50], [90, 255, 255]], ...}}, ...]}
+
+Missing keys fall back to the single-tank constants in feeding/color.py.
+Metrics are exported once, labelled by tank.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from prometheus_client import start_http_server
+
+from feeding.color import (AlgaeSystem, FEEDING_TIMES, METRICS_PORT, MONITOR_INTERVAL,
+                           default_tank)
+from feeding.coverage import analyze_frames
+from feeding.runtime import run_schedule
+
+
+def load_tanks(path):
+    """Tank configs from a JSON file, completed with the single-tank defaults"""
+    with open(path) as f:
+        config = json.load(f)
+    tanks = []
+    for i, entry in enumerate(config['tanks']):
+        tank = default_tank()
+        tank['name'] = f"tank{i + 1}"
+        tank.update(entry)
+        tanks.append(tank)
+    names = [tank['name'] for tank in tanks]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate tank names in {path}: {names}")
+    pins = [tank['pump_pin'] for tank in tanks]
+    if len(set(pins)) != len(pins):
+        raise ValueError(f"Tanks in {path} share a pump pin: {pins}")
+    return tanks
+
+
+class TankLine:
+    """Runs one AlgaeSystem per tank on a shared schedule and worker pool"""
+
+    def __init__(self, tanks, workers=None):
+        start_http_server(METRICS_PORT)
+        # Spawned workers import only feeding.coverage; forking would copy the grabber threads
+        self.pool = ProcessPoolExecutor(max_workers=workers or min(len(tanks), os.cpu_count() or 1),
+                                        mp_context=multiprocessing.get_context('spawn'))
+        self.systems = [AlgaeSystem(tank, start_metrics=False, local_analysis=False) for tank in tanks]
+
+    @classmethod
+    def from_config(cls, path, workers=None):
+        return cls(load_tanks(path), workers)
+
+    def shutdown(self):
+        for system in self.systems:
+            system.shutdown()
+        self.pool.shutdown(cancel_futures=True)
+
+    async def readings(self):
+        """Coverage of every tank, analysed concurrently; None where a camera has no frames"""
+        futures, analysed = [], []
+        for system in self.systems:
+            frames = system.latest_frames()
+            if frames and not system.needs_analysis(frames[-1]):
+                # Unchanged scene: reuse the last reading instead of shipping frames to a worker
+                futures.append(asyncio.sleep(0, system.change_detector.result))
+                analysed.append(False)
+                continue
+            futures.append(asyncio.wrap_future(self.pool.submit(analyze_frames, frames, system.engine_params(),
+                                                                system.tank['bands'])))
+            analysed.append(True)
+        results = {}
+        gathered = await asyncio.gather(*futures, return_exceptions=True)
+        for system, result, fresh in zip(self.systems, gathered, analysed):
+            if isinstance(result, Exception):
+                print(f"⚠️ {system.name}: analysis failed: {result}")
+                result = (None, {})
+            elif fresh and system.change_detector and result[0] is not None:
+                system.change_detector.store(result)
+            results[system.name] = system.record_coverage(*result)
+        return results
+
+    async def monitoring_cycle(self):
+        for name, coverage in (await self.readings()).items():
+            if coverage is None:
+                print(f"{datetime.now():%H:%M} - {name}: no recent frames")
+            else:
+                print(f"{datetime.now():%H:%M} - {name} coverage: {coverage:.1f}%")
+
+    async def feeding_cycle(self):
+        readings = await self.readings()
+        # Pumps run concurrently, each on its own timer
+        await asyncio.gather(*(system.feed(readings[system.name]) for system in self.systems
+                               if readings[system.name] is not None))
+
+    async def run_async(self):
+        await self.monitoring_cycle()
+
+        print(f"Algae monitoring started for {len(self.systems)} tanks")
+        await run_schedule(FEEDING_TIMES, self.feeding_cycle, MONITOR_INTERVAL * 60, self.monitoring_cycle)
+
+    def run(self):
+        asyncio.run(self.run_async())
@@ -0,0 +1,108 @@
+import numpy as np
+
+DEFAULT_WINDOWS = {'1h': 3600, '6h': 6 * 3600, '24h': 24 * 3600}
+REBASE_SECONDS = 7 * 24 * 3600  # re-centre x and refresh the sums this often
+
+
+class _WindowSums:
+    __slots__ = ('seconds', 'start', 'n', 'sx', 'sy', 'sxy', 'sxx')
+
+    def __init__(self, seconds, start):
+        self.seconds = seconds
+        self.start = start  # sequence number of the oldest point in the window
+        self.n = 0
+        self.sx = self.sy = self.sxy = self.sxx = 0.0
+
+    def add(self, x, y):
+        self.n += 1
+        self.sx += x
+        self.sy += y
+        self.sxy += x * y
+        self.sxx += x * x
+
+    def remove(self, x, y):
+        self.n -= 1
+        self.sx -= x
+        self.sy -= y
+        self.sxy -= x * y
+        self.sxx -= x * x
+
+
+class StreamingTrend:
+    """
+    Least-squares slope of (time, value) readings over several sliding windows.
+
+    Readings live once in a shared array-backed ring buffer; every window keeps
+    running sums (n, Σx, Σy, Σxy, Σx²) and the sequence number of its oldest
+    point. Adding a reading and evicting expired ones is amortised O(1) per
+    window regardless of sampling rate. x is stored relative to a reference
+    time that is moved forward weekly, when the sums are rebuilt exactly.
+    """
+
+    def __init__(self, windows=None, capacity=1024):
+        self.windows = {name: _WindowSums(seconds, 0) for name, seconds in (windows or DEFAULT_WINDOWS).items()}
+        self._t = np.empty(capacity, dtype=np.float64)
+        self._y = np.empty(capacity, dtype=np.float64)
+        self._first = 0  # sequence number of the oldest retained point
+        self._next = 0   # sequence number of the next point
+        self._t_ref = None
+
+    def __len__(self):
+        return self._next - self._first
+
+    def _grow(self):
+        capacity = self._t.size
+        idx = np.arange(self._first, self._next) % capacity
+        t, y = self._t[idx], self._y[idx]
+        self._t = np.empty(capacity * 2, dtype=np.float64)
+        self._y = np.empty(capacity * 2, dtype=np.float64)
+        new_idx = np.arange(self._first, self._next) % self._t.size
+        self._t[new_idx] = t
+        self._y[new_idx] = y
+
+    def _rebase(self, t_ref):
+        self._t_ref = t_ref
+        for window in self.windows.values():
+            idx = np.arange(window.start, self._next) % self._t.size
+            x = self._t[idx] - t_ref
+            y = self._y[idx]
+            window.n = idx.size
+            window.sx, window.sy = float(x.sum()), float(y.sum())
+            window.sxy, window.sxx = float(x @ y), float(x @ x)
+
+    def add(self, t, value):
+        """Add a reading at epoch seconds t (readings must arrive in time order)"""
+        if self._t_ref is None:
+            self._t_ref = t
+        if len(self) == self._t.size:
+            self._grow()
+        pos = self._next % self._t.size
+        self._t[pos] = t
+        self._y[pos] = value
+        self._next += 1
+
+        x = t - self._t_ref
+        for window in self.windows.values():
+            window.add(x, value)
+            cutoff = t - window.seconds
+            while window.start < self._next - 1 and self._t[window.start % self._t.size] < cutoff:
+                old = window.start % self._t.size
+                window.remove(self._t[old] - self._t_ref, self._y[old])
+                window.start += 1
+        self._first = min(w.start for w in self.windows.values())
+
+        if x > REBASE_SECONDS:
+            self._rebase(self._t[self._first % self._t.size])
+
+    def slope(self, window='24h'):
+        """Trend in value units per hour over the named window (0 if undefined)"""
+        w = self.windows[window]
+        if w.n < 2:
+            return 0
+        denom = w.n * w.sxx - w.sx ** 2
+        if denom <= 1e-9 * w.n * w.sxx:
+            return 0
+        return (w.n * w.sxy - w.sx * w.sy) / denom * 3600
+
+    def count(self, window='24h'):
+        return self.windows[window].n
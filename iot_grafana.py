@@ -0,0 +1,179 @@
+"""
+Single entry point for the scheduled jobs.
+
+    python iot_grafana.py tuya-poll --output tuya/device.csv --timezone +8
+    python iot_grafana.py tuya-poll --sink influx
+    python iot_grafana.py tuya-devices --force
+    python iot_grafana.py edenic-pull
+    python iot_grafana.py backfill --days 90
+    python iot_grafana.py csv-format --input edenic_v1/export.csv --output-dir edenic_v1
+    python iot_grafana.py feeding
+    python iot_grafana.py feeding --tanks feeding/tanks.example.json
+    python iot_grafana.py feeding-export --tank tank1 --sink influx
+    python iot_grafana.py replay captures/ --output replay.csv --feedings feedings.csv
+    python iot_grafana.py quality
+    python iot_grafana.py rollup
+    python iot_grafana.py dli --schedule 06:00-18:00 --ppfd 424
+    python iot_grafana.py serve --port 8081
+    python iot_grafana.py migrate-timestamps --dry-run
+
+Only argparse is imported up front. Each subcommand names its handler as a
+"module:function" string that is imported at dispatch time, so an hourly Tuya
+poll never loads pandas, influxdb_client or OpenCV.
+"""
+import argparse
+import importlib
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# subcommand -> handler, resolved lazily; tuya-poll picks one per --sink
+HANDLERS = {
+    'tuya-poll': {
+        'csv': 'tuya.tuya_csv:main',
+        'influx': 'tuya.tuya_influx:main',
+    },
+    'tuya-devices': 'tuya.registry:main',
+    'edenic-pull': 'pull_csv:main',
+    'backfill': 'pull_csv:backfill',
+    'csv-format': 'edenic_v1.csv_format:format_export',
+    'feeding': 'feeding.color:main',
+    'replay': 'feeding.replay:main',
+    'feeding-export': 'feeding.history:export',
+    'quality': 'series.quality:main',
+    'rollup': 'series.rollup:main',
+    'dli': 'series.dli:main',
+    'serve': 'series.server:main',
+    'migrate-timestamps': 'series.timestamps:main',
+}
+
+# parsed arguments that only steer the CLI itself
+CLI_ONLY_ARGS = {'command', 'sink', 'append'}
+
+
+def int_tuple(text):
+    """'30,50,50' -> (30, 50, 50)"""
+    return tuple(int(v) for v in text.split(','))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='iot-grafana', description="IoT data collection jobs")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    tuya = subparsers.add_parser('tuya-poll', help="poll the Tuya sensor once")
+    tuya.add_argument('--sink', choices=sorted(HANDLERS['tuya-poll']), default='csv')
+    tuya.add_argument('--output', help="CSV file to append to (default: $CSV_FILE or tuya/device.csv)")
+    tuya.add_argument('--timezone', dest='timezone_hours', type=float, default=8,
+                      help="UTC offset of an old-format CSV being migrated (new rows are epoch ms)")
+    tuya.add_argument('--device-id', help="device to poll (default: $TUYA_DEVICE_ID)")
+    tuya.add_argument('--append', action='store_true', help="accepted for compatibility; the CSV is always appended")
+
+    devices = subparsers.add_parser('tuya-devices', help="refresh and list the cached Tuya fleet metadata")
+    devices.add_argument('--force', action='store_true', help="refresh even if the cache is within its TTL")
+    devices.add_argument('--ttl', type=int, default=argparse.SUPPRESS, help="cache lifetime in seconds (default 6h)")
+    devices.add_argument('--quiet', action='store_true', help="print counts only, no device ids or names")
+
+    edenic = subparsers.add_parser('edenic-pull', help="pull recent Edenic telemetry into edenic_*.csv")
+    edenic.add_argument('--days', type=int, default=7)
+    edenic.add_argument('--output-dir', default='.')
+
+    backfill = subparsers.add_parser('backfill', help="pull a long Edenic history in windows")
+    backfill.add_argument('--days', type=int, required=True)
+    backfill.add_argument('--chunk-days', type=int, default=7)
+    backfill.add_argument('--output-dir', default='.')
+
+    csv_format = subparsers.add_parser('csv-format', help="split a Bluelab export into per-parameter files")
+    csv_format.add_argument('--input', dest='input_path', default='edenic_v1/export.csv')
+    csv_format.add_argument('--output-dir', default='edenic_v1')
+
+    feeding = subparsers.add_parser('feeding', help="run the algae monitoring and feeding loop")
+    feeding.add_argument('--tanks', help="JSON tank config for multi-camera mode (see feeding/tanks.py)")
+
+    export = subparsers.add_parser('feeding-export', help="export stored coverage readings")
+    export.add_argument('--tank', default='tank1')
+    export.add_argument('--sink', dest='target', choices=['csv', 'influx'], default='csv')
+    export.add_argument('--output', help="CSV file (default: algae_<tank>.csv)")
+    export.add_argument('--days', type=float, help="only the last N days")
+
+    replay = subparsers.add_parser('replay', help="batch coverage analysis over recorded images/video")
+    replay.add_argument('inputs', nargs='+', help="image directories/files and video files")
+    replay.add_argument('--output', default='replay.csv', help="coverage series (.csv or .parquet)")
+    replay.add_argument('--feedings', help="also write the simulated feedings here")
+    replay.add_argument('--every', type=float, default=60.0, help="video sampling interval in seconds")
+    replay.add_argument('--start', help="recording start (ISO time) of the first video")
+    replay.add_argument('--time-format', help="strftime format of image file names, e.g. %%Y%%m%%d_%%H%%M%%S")
+    replay.add_argument('--hsv-lower', type=int_tuple, default=argparse.SUPPRESS, help="H,S,V")
+    replay.add_argument('--hsv-upper', type=int_tuple, default=argparse.SUPPRESS, help="H,S,V")
+    replay.add_argument('--roi', type=int_tuple, default=argparse.SUPPRESS, help="tank region x,y,w,h")
+    replay.add_argument('--downscale', type=int, default=argparse.SUPPRESS)
+    replay.add_argument('--method', choices=['hsv', 'lut'], default=argparse.SUPPRESS)
+    replay.add_argument('--base-duration', type=float, default=argparse.SUPPRESS,
+                        help="BASE_FEED_DURATION to simulate")
+    replay.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+
+    quality = subparsers.add_parser('quality', help="flag gaps, flatlines, out-of-range values and spikes")
+    quality.add_argument('--series', nargs='+', help="series to scan (default: all)")
+    quality.add_argument('--full', action='store_true', help="forget previous progress and rescan")
+
+    rollup = subparsers.add_parser('rollup', help="update hourly/daily min/max/mean/count tables")
+    rollup.add_argument('--series', nargs='+', help="series to roll up (default: all)")
+    rollup.add_argument('--full', action='store_true', help="drop existing tables and rebuild")
+
+    dli = subparsers.add_parser('dli', help="update the daily light integral table from PPFD")
+    dli.add_argument('--schedule', help="derive PPFD from LED on-times instead of ppfd.csv, e.g. 06:00-18:00")
+    dli.add_argument('--ppfd', type=float, default=argparse.SUPPRESS,
+                     help="PPFD while the LEDs are on (default: the ppfd.py estimate)")
+    dli.add_argument('--days', type=int, default=argparse.SUPPRESS,
+                     help="with --schedule, days before today to start from on the first run")
+    dli.add_argument('--full', action='store_true', help="drop the stored integral and table and restart")
+
+    serve = subparsers.add_parser('serve', help="serve the stored series to Grafana (JSON/Infinity datasource)")
+    serve.add_argument('--host', default='0.0.0.0')
+    serve.add_argument('--port', type=int, default=argparse.SUPPRESS, help="default 8081")
+    serve.add_argument('--cache-size', type=int, default=argparse.SUPPRESS, help="aggregated results kept in memory")
+
+    migrate = subparsers.add_parser('migrate-timestamps', help="rewrite legacy CSV timestamps as epoch ms (one-time)")
+    migrate.add_argument('paths', nargs='*', help="files to migrate (default: every known legacy file)")
+    migrate.add_argument('--dry-run', action='store_true', help="only check that every timestamp parses")
+    return parser
+
+
+def resolve_handler(args):
+    """Import and return the handler function for parsed arguments"""
+    spec = HANDLERS[args.command]
+    if isinstance(spec, dict):
+        spec = spec[args.sink]
+    module_name, func_name = spec.split(':')
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def handler_kwargs(args):
+    """Argument dests double as the handler's keyword arguments"""
+    if args.command == 'tuya-poll' and args.sink == 'influx':
+        return {}  # the Influx logger is configured entirely from .env
+    return {k: v for k, v in vars(args).items() if k not in CLI_ONLY_ARGS}
+
+
+def load_env():
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    # Load environment variables from .env file
+    load_dotenv()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'tuya-poll' and args.sink == 'influx' and (args.output or args.device_id):
+        print("⚠️ --output/--device-id are ignored with --sink influx (configure via .env)")
+    load_env()
+    handler = resolve_handler(args)
+    return handler(**handler_kwargs(args)) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,30 @@
+"""
+Mussel carbon model: daily carbon (kg) from the start of the culture.
+
+The whole date range is one NumPy array of day numbers, and a set of
+parameter draws is a column of each parameter, so the model evaluates every
+(draw, day) pair in a single broadcast expression. With --draws the
+parameters are sampled around the constants below and every day gets
+percentile columns next to the deterministic carbon_kg.
+
+Temperature enters through temperature_factor(), a thermal response curve
+applied to each day's growth (the day-on-day step of the curve, accumulated),
+fed with the measured water temperature: the stored temperature series are
+averaged per local day in one bincount pass and as-of joined onto the model
+days, so a day without readings takes the latest earlier daily mean (up to
+TEMPERATURE_MAX_AGE_DAYS old). Days beyond that, including the future, use
+REFERENCE_TEMP. Re-running after new readings land updates the projection.
+
+    python musselc.py
+    python musselc.py --constant     # fixed TEMP_FACTOR, as before
+    python musselc.py --draws 10000 --percentiles 5,50,95
+"""
+import argparse
 import csv
-from datetime import datetime, timedelta
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 # Constants
 START_DATE = "2025-07-01"
@@ -10,19 +35,236 @@ DAILY_SPIRULINA_L = 100
 MUSSEL_COUNT = 7
 TEMP_FACTOR = 2  # For 28°C
 
-def calculate_daily_carbon(date):
-    days = (date - datetime.strptime(START_DATE, "%Y-%m-%d")).days
-    return BASE_RATE * pow(days, GROWTH_EXPONENT) * (0.0005 * DAILY_SPIRULINA_L) * MUSSEL_COUNT * TEMP_FACTOR
-
-# Generate data
-with open('musselc.csv', 'w', newline='') as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(["", "carbon_kg"])
-    
-    current_date = datetime.strptime(START_DATE, "%Y-%m-%d")
-    end_date = datetime.strptime(END_DATE, "%Y-%m-%d")
-    
-    while current_date <= end_date:
-        daily_carbon = calculate_daily_carbon(current_date)
-        writer.writerow([current_date.strftime("%Y-%m-%d"), round(daily_carbon, 3)])
-        current_date += timedelta(days=1)
\ No newline at end of file
+# Thermal response: Q10 scaling from the reference up to the optimum, then a
+# linear drop to zero at the upper limit
+REFERENCE_TEMP = 28.0
+Q10 = 2.0
+OPTIMUM_TEMP = 30.0
+UPPER_TEMP = 36.0
+# Measured temperature, by priority where several sources cover a day
+TEMPERATURE_SERIES = ('tuya_temperature', 'edenic_temperature', 'bluelab_temperature')
+TEMPERATURE_MAX_AGE_DAYS = 7
+DAY_UTC_OFFSET = 8  # local days, as in the rollups
+
+# Monte Carlo spread around the constants
+BASE_RATE_SD = 0.20        # relative (lognormal)
+GROWTH_EXPONENT_SD = 0.05  # absolute (normal)
+TEMP_FACTOR_SD = 0.15      # relative (lognormal)
+MUSSEL_SURVIVAL = 0.9      # each mussel survives the period with this probability
+PERCENTILES = (5, 50, 95)
+CHUNK_VALUES = 4 * 1024 * 1024  # (draws x days) values evaluated at once
+
+
+def date_range(start=START_DATE, end=END_DATE):
+    """Every date from start to end inclusive, as datetime64[D]"""
+    return np.arange(np.datetime64(start), np.datetime64(end) + 1, dtype='datetime64[D]')
+
+
+def daily_carbon(days, base_rate=BASE_RATE, growth_exponent=GROWTH_EXPONENT, spirulina_l=DAILY_SPIRULINA_L,
+                 mussel_count=MUSSEL_COUNT, temp_factor=TEMP_FACTOR):
+    """Carbon (kg) on each day number; parameters broadcast against days (e.g. (draws, 1) columns)"""
+    return carbon_scale(base_rate, spirulina_l, mussel_count, temp_factor) * np.power(days, growth_exponent)
+
+
+def carbon_scale(base_rate=BASE_RATE, spirulina_l=DAILY_SPIRULINA_L, mussel_count=MUSSEL_COUNT,
+                 temp_factor=TEMP_FACTOR):
+    """Everything in daily_carbon but the growth curve; one value per draw, multiplied in once"""
+    return base_rate * (0.0005 * spirulina_l) * mussel_count * temp_factor
+
+
+def temperature_factor(temp_c):
+    """TEMP_FACTOR scaled by the thermal response; TEMP_FACTOR at REFERENCE_TEMP"""
+    temp_c = np.asarray(temp_c, dtype=np.float64)
+    rising = Q10 ** ((np.minimum(temp_c, OPTIMUM_TEMP) - REFERENCE_TEMP) / 10)
+    falling = np.clip((UPPER_TEMP - temp_c) / (UPPER_TEMP - OPTIMUM_TEMP), 0.0, 1.0)
+    return TEMP_FACTOR * rising * np.where(temp_c > OPTIMUM_TEMP, falling, 1.0)
+
+
+def daily_temperature(dates, names=TEMPERATURE_SERIES, max_age_days=TEMPERATURE_MAX_AGE_DAYS):
+    """
+    Water temperature for each date: the daily mean of the first source with
+    readings that day, else the latest earlier one within max_age_days, else
+    NaN.
+    """
+    from series.sources import SERIES, read_series, series_path
+
+    day_ms = 24 * 60 * 60 * 1000
+    first_day = dates[0].astype(np.int64)
+    n_days = len(dates)
+    keys, values = [], []
+    for priority, name in enumerate(names):
+        if not os.path.exists(series_path(name)):
+            continue
+        ts, temps = read_series(name)
+        low, high = SERIES[name]['valid_range']
+        day = (ts + DAY_UTC_OFFSET * 60 * 60 * 1000) // day_ms - first_day
+        keep = (day >= 0) & (day < n_days) & (temps >= low) & (temps <= high)
+        keys.append(priority * n_days + day[keep])
+        values.append(temps[keep])
+    if not keys:
+        return np.full(n_days, np.nan)
+
+    # Per (source, day) means in one pass, then the first source with data per day
+    keys, values = np.concatenate(keys), np.concatenate(values)
+    size = len(names) * n_days
+    counts = np.bincount(keys, minlength=size).reshape(len(names), n_days)
+    sums = np.bincount(keys, weights=values, minlength=size).reshape(len(names), n_days)
+    has = counts > 0
+    first = has.argmax(axis=0)
+    measured = has.any(axis=0)
+    columns = np.arange(n_days)
+    daily = sums[first, columns] / np.maximum(counts[first, columns], 1)
+
+    # As-of join: the latest measured day at or before each date
+    measured_days = np.flatnonzero(measured)
+    if not measured_days.size:
+        return np.full(n_days, np.nan)
+    latest = np.searchsorted(measured_days, columns, side='right') - 1
+    source_day = measured_days[np.maximum(latest, 0)]
+    fresh = (latest >= 0) & (columns - source_day <= max_age_days)
+    return np.where(fresh, daily[source_day], np.nan)
+
+
+def draw_parameters(draws, seed=None):
+    """{parameter: (draws, 1) column} sampled around the constants"""
+    rng = np.random.default_rng(seed)
+    return {
+        'base_rate': BASE_RATE * rng.lognormal(0.0, BASE_RATE_SD, (draws, 1)),
+        'growth_exponent': rng.normal(GROWTH_EXPONENT, GROWTH_EXPONENT_SD, (draws, 1)),
+        'mussel_count': rng.binomial(MUSSEL_COUNT, MUSSEL_SURVIVAL, (draws, 1)).astype(np.float64),
+        'temp_factor': TEMP_FACTOR * rng.lognormal(0.0, TEMP_FACTOR_SD, (draws, 1)),
+    }
+
+
+def daily_increments(days, params, temp_factor):
+    """
+    (draws, days) carbon added on each day - the step of the growth curve
+    from the day before - scaled by that day's temperature factor, so a hot
+    day slows growth that day instead of rescaling the accumulated total.
+    Day 0 is the start of the culture and adds nothing.
+    """
+    exponent = params.get('growth_exponent', GROWTH_EXPONENT)
+    scale = carbon_scale(**{k: v for k, v in params.items() if k != 'growth_exponent'})
+    # In place: at 10,000 draws each (draws, days) temporary costs more than the arithmetic
+    step = np.power(days, exponent)
+    step -= np.power(np.maximum(days - 1, 0), exponent)
+    step *= scale
+    step *= temp_factor / TEMP_FACTOR
+    return step
+
+
+def accumulated_carbon(days, temp_factor):
+    """Deterministic carbon (kg) on each day with a per-day temperature factor"""
+    return np.cumsum(daily_increments(days, {}, temp_factor), axis=-1)
+
+
+def chunk_total(days, params, temp_factor):
+    """Carbon each draw adds over a chunk of days"""
+    return daily_increments(days, params, temp_factor).sum(axis=1)
+
+
+def chunk_carbon(days, params, temp_factor=None, carry=None):
+    """
+    (draws, days) carbon over a chunk. With a per-day temp_factor the chunk's
+    increments are accumulated on top of carry, each draw's carbon at the end
+    of the previous chunks.
+    """
+    if temp_factor is None:
+        return daily_carbon(days, **params)
+    # Drawn temperature factors scale the per-day response instead of replacing it
+    carbon = np.cumsum(daily_increments(days, params, temp_factor), axis=1)
+    carbon += carry[:, None]
+    return carbon
+
+
+def percentile_chunk(days, params, percentiles, temp_factor=None, carry=None):
+    """(percentiles, days) of the carbon distribution over all draws"""
+    carbon = chunk_carbon(days, params, temp_factor, carry)
+    return np.percentile(carbon, percentiles, axis=0, overwrite_input=True)
+
+
+def simulate(days, params, percentiles=PERCENTILES, workers=1, chunk_values=CHUNK_VALUES, temp_factor=None):
+    """
+    Percentiles over the parameter draws for every day. Days are processed in
+    chunks so memory stays at chunk_values floats however many draws there
+    are; chunks go to worker processes when workers > 1. temp_factor is an
+    optional per-day response (see temperature_factor); carbon then depends
+    on every earlier day: in one process each chunk starts from the last
+    day of the one before, while workers need a first pass that sums each
+    chunk per draw so the running totals can seed the second.
+    """
+    draws = len(next(iter(params.values())))
+    size = max(1, chunk_values // draws)
+    starts = range(0, len(days), size)
+    chunks = [days[i:i + size] for i in starts]
+    n = len(chunks)
+    factors = [None if temp_factor is None else temp_factor[i:i + size] for i in starts]
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and n > 1 else None
+    run = pool.map if pool else map
+    try:
+        if temp_factor is not None and pool is None:
+            results, carry = [], np.zeros(draws)
+            for chunk, factor in zip(chunks, factors):
+                carbon = chunk_carbon(chunk, params, factor, carry)
+                carry = carbon[:, -1].copy()
+                results.append(np.percentile(carbon, percentiles, axis=0, overwrite_input=True))
+            return np.concatenate(results, axis=1)
+        carries = [None] * n
+        if temp_factor is not None:
+            totals = np.array(list(run(chunk_total, chunks, [params] * n, factors)))
+            carries = list(np.cumsum(totals, axis=0) - totals)
+        results = list(run(percentile_chunk, chunks, [params] * n, [percentiles] * n, factors, carries))
+    finally:
+        if pool:
+            pool.shutdown()
+    return np.concatenate(results, axis=1)
+
+
+def epoch_ms(dates):
+    """Local midnight of each date as epoch ms (UTC)"""
+    return dates.astype('datetime64[ms]').astype(np.int64) - DAY_UTC_OFFSET * 60 * 60 * 1000
+
+
+def write_csv(path, dates, carbon, bands=None, percentiles=PERCENTILES, temperature=None):
+    header = ["time", "carbon_kg"] + [f"carbon_kg_p{p:g}" for p in (percentiles if bands is not None else ())]
+    columns = [np.round(carbon, 3).tolist()]
+    if bands is not None:
+        columns += np.round(bands, 3).tolist()
+    if temperature is not None:
+        header.append("temperature_c")
+        columns.append(['' if np.isnan(t) else round(t, 2) for t in temperature.tolist()])
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)
+        writer.writerows(zip(epoch_ms(dates).tolist(), *columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Daily mussel carbon projection")
+    parser.add_argument('--draws', type=int, default=0, help="Monte Carlo parameter draws (0: deterministic only)")
+    parser.add_argument('--percentiles', default=','.join(map(str, PERCENTILES)))
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--constant', action='store_true', help="use TEMP_FACTOR instead of measured temperature")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--output', default='musselc.csv')
+    args = parser.parse_args()
+
+    dates = date_range()
+    days = (dates - dates[0]).astype(np.float64)
+    temperature = factor = None
+    if not args.constant:
+        temperature = daily_temperature(dates)
+        factor = temperature_factor(np.where(np.isnan(temperature), REFERENCE_TEMP, temperature))
+        print(f"Measured temperature on {np.count_nonzero(~np.isnan(temperature))} of {len(dates)} days")
+    carbon = daily_carbon(days) if factor is None else accumulated_carbon(days, factor)
+    bands = None
+    percentiles = [float(p) for p in args.percentiles.split(',')]
+    if args.draws:
+        bands = simulate(days, draw_parameters(args.draws, args.seed), percentiles,
+                         args.workers or os.cpu_count() or 1, temp_factor=factor)
+    write_csv(args.output, dates, carbon, bands, percentiles, temperature)
+    print(f"{len(dates)} days{f' x {args.draws} draws' if args.draws else ''} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
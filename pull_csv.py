@@ -1,7 +1,6 @@
 import os
 import requests
 import time
-import pandas as pd
 import json
 from datetime import datetime
 
@@ -9,36 +8,39 @@ from datetime import datetime
 API_KEY = os.environ.get('API_KEY')
 API_URL = os.environ.get('API_URL')
 
-if not API_KEY or not API_URL:
-    raise ValueError("Missing required tokens in environment variables.")
+DAY_MS = 24 * 60 * 60 * 1000
 
-headers = {
-    "Authorization": API_KEY
-}
-
-def get_timestamps_past_7_days():
+def get_timestamps_past_7_days(days=7):
     # Current time (end timestamp) in milliseconds
     end_ts = int(time.time() * 1000)
     # Start timestamp = 7 days ago in milliseconds
-    start_ts = end_ts - (7 * 24 * 60 * 60 * 1000)
+    start_ts = end_ts - (days * DAY_MS)
     
     # Debug output to see the actual timestamps
     print(f"Generated timestamps:")
     print(f"  Start TS: {start_ts} ({datetime.fromtimestamp(start_ts/1000).strftime('%Y-%m-%d %H:%M:%S')})")
     print(f"  End TS:   {end_ts} ({datetime.fromtimestamp(end_ts/1000).strftime('%Y-%m-%d %H:%M:%S')})")
-    print(f"  Query range: 7 days from {datetime.fromtimestamp(start_ts/1000).strftime('%Y-%m-%d')} to {datetime.fromtimestamp(end_ts/1000).strftime('%Y-%m-%d')}")
+    print(f"  Query range: {days} days from {datetime.fromtimestamp(start_ts/1000).strftime('%Y-%m-%d')} to {datetime.fromtimestamp(end_ts/1000).strftime('%Y-%m-%d')}")
     
     return start_ts, end_ts
 
-def fetch_telemetry():
-    start_ts, end_ts = get_timestamps_past_7_days()
+def fetch_telemetry(start_ts=None, end_ts=None, interval=10800000):
+    if not API_KEY or not API_URL:
+        raise ValueError("Missing required tokens in environment variables.")
+
+    if start_ts is None or end_ts is None:
+        start_ts, end_ts = get_timestamps_past_7_days()
+
+    headers = {
+        "Authorization": API_KEY
+    }
     
     # Build query string with comma-separated keys
     query_string = (
         f"keys=ph,temperature,electrical_conductivity"
         f"&startTs={start_ts}"
         f"&endTs={end_ts}"
-        f"&interval=10800000"
+        f"&interval={interval}"
         f"&agg=AVG"
         f"&orderBy=ASC"
     )
@@ -50,11 +52,36 @@ def fetch_telemetry():
         print(f"Failed to fetch telemetry data: {e}")
         return None
 
-def transform_and_export_csv(data):
+    return resp.json()
+
+def fetch_telemetry_range(days, chunk_days=7, interval=10800000):
+    """
+    Fetch a long history in chunk_days windows (oldest first) and merge
+    the per-parameter point lists, dropping points repeated at window edges.
+    """
+    end_ts = int(time.time() * 1000)
+    start_ts = end_ts - days * DAY_MS
+    merged = {}
+
+    chunk_start = start_ts
+    while chunk_start < end_ts:
+        chunk_end = min(chunk_start + chunk_days * DAY_MS, end_ts)
+        print(f"Fetching {datetime.fromtimestamp(chunk_start/1000):%Y-%m-%d} to {datetime.fromtimestamp(chunk_end/1000):%Y-%m-%d}")
+        data = fetch_telemetry(chunk_start, chunk_end, interval)
+        if data is None:
+            return None
+        for param_name, param_data in data.items():
+            merged.setdefault(param_name, {}).update((point['ts'], point) for point in param_data or [])
+        chunk_start = chunk_end
+
+    return {name: [points[ts] for ts in sorted(points)] for name, points in merged.items()}
+
+def transform_and_export_csv(data, output_dir="."):
     """
     Transform the JSON data into separate CSV files for each parameter.
     Based on the original code structure where data is organized by parameter names.
     """
+    import pandas as pd
     
     if not data:
         print("No data to process")
@@ -79,18 +106,18 @@ def transform_and_export_csv(data):
             print(f"Empty DataFrame for {param_name}")
             continue
             
-        # Convert timestamp and value
-        df['ts'] = pd.to_datetime(df['ts'], unit='ms')
+        # Keep the API's epoch-ms timestamps; convert the value
+        df['ts'] = pd.to_numeric(df['ts']).astype('int64')
         df['value'] = pd.to_numeric(df['value'], errors='coerce')
         
         # Rename columns to match expected format
         df = df.rename(columns={
-            'ts': '',
+            'ts': 'time',
             'value': param_name
         })
         
         # Create filename based on parameter
-        filename = f"edenic_{param_name}.csv"
+        filename = os.path.join(output_dir, f"edenic_{param_name}.csv")
         
         try:
             # Export to CSV
@@ -130,13 +157,30 @@ def debug_api_response(data):
             print(f"Value: {value}")
     print("="*60 + "\n")
 
-if __name__ == "__main__":
-    data = fetch_telemetry()
+def main(days=7, output_dir="."):
+    """Pull the last `days` days of telemetry into edenic_*.csv"""
+    start_ts, end_ts = get_timestamps_past_7_days(days)
+    data = fetch_telemetry(start_ts, end_ts)
     if data:
         # First, debug the response structure
         debug_api_response(data)
         
         # Then try to export
-        transform_and_export_csv(data)
+        transform_and_export_csv(data, output_dir)
+        return 0
+    else:
+        print("❌ No data received from API")
+        return 1
+
+def backfill(days, chunk_days=7, output_dir="."):
+    """Pull a long history window by window into edenic_*.csv"""
+    data = fetch_telemetry_range(days, chunk_days)
+    if data:
+        transform_and_export_csv(data, output_dir)
+        return 0
     else:
         print("❌ No data received from API")
+        return 1
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Daily light integral (mol/m²/day) from a PPFD series, folded in as points arrive.
+
+DLI is the integral of PPFD (µmol/m²/s) over a local day, divided by 1e6.
+The integral is kept as a running state (the last point plus the open day's
+sum and covered time), so every batch only integrates the segments it adds:
+trapezoids between consecutive points at whatever spacing they come, split at
+local midnight where a segment crosses it. Finishing a day is just emitting
+the open sum. Segments longer than the gap limit (sensor outages) are left
+out and show up as fewer covered hours.
+
+Two sources:
+
+* measured: the 'ppfd' series (ppfd.csv: time, PPFD), read incrementally
+  like the rollups;
+* schedule: a constant PPFD while the LEDs are on, e.g. 06:00-18:00 at the
+  ppfd.py estimate, integrated as a step function up to now.
+
+Per-day rows go to rollup/<name>_dli_1d.csv (epoch-ms local-midnight starts,
+dli, covered hours, complete flag), next to the other daily tables.
+
+    python iot_grafana.py dli
+    python iot_grafana.py dli --schedule 06:00-18:00 --ppfd 424
+"""
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from series.rollup import DAY_MS, DAY_UTC_OFFSET, ROLLUP_DIR, bucket_start, table_path
+from series.sources import HOUR_MS, SERIES, STATE_FILE, load_state, read_new, save_state, series_path
+
+MEASURED = 'ppfd'
+SCHEDULE_NAME = 'schedule'
+SCHEDULE_PPFD = 15 * 2 / (math.pi * ((150 / 2) / 10 / 100) ** 2)  # ppfd.py example: 15 W at 2 µmol/J
+MAX_GAP_INTERVALS = 3  # measured segments longer than this many sampling intervals are outages
+TABLE_COLUMNS = ['dli', 'hours', 'complete']
+
+
+class DailyIntegral:
+    """Running PPFD integral of the open day, plus the last point seen"""
+
+    def __init__(self, max_gap_ms, step=False, utc_offset=DAY_UTC_OFFSET, state=None):
+        if not 0 < max_gap_ms <= DAY_MS:
+            raise ValueError("max_gap_ms must be more than 0 and at most a day")
+        self.max_gap_ms = max_gap_ms
+        self.step = step  # hold each value until the next point instead of interpolating
+        self.utc_offset = utc_offset
+        state = state or {}
+        self.last_ts = state.get('last_ts')
+        self.last_value = state.get('last_value')
+        self.day = state.get('day')
+        self.area = state.get('area', 0.0)  # PPFD x ms
+        self.covered_ms = state.get('covered_ms', 0)
+
+    def state(self):
+        return {'last_ts': self.last_ts, 'last_value': self.last_value, 'day': self.day,
+                'area': self.area, 'covered_ms': self.covered_ms}
+
+    def _area(self, t0, t1, v0, v1):
+        return v0 * (t1 - t0) if self.step else (v0 + v1) / 2 * (t1 - t0)
+
+    def extend(self, ts, values):
+        """
+        Fold time-sorted points in and return {day: (area, covered_ms)} for the
+        days they finish. Points not after the last one seen are ignored.
+        """
+        if self.last_ts is not None:
+            newer = ts > self.last_ts
+            ts, values = ts[newer], values[newer]
+        if not ts.size:
+            return {}
+        if self.last_ts is None:
+            t, v = ts, values
+        else:
+            t = np.concatenate(([self.last_ts], ts))
+            v = np.concatenate(([self.last_value], values))
+
+        t0, t1, v0, v1 = t[:-1], t[1:], v[:-1], v[1:]
+        valid = (t1 > t0) & (t1 - t0 <= self.max_gap_ms) & ~np.isnan(v0)
+        if not self.step:
+            valid &= ~np.isnan(v1)
+        t0, t1, v0, v1 = t0[valid], t1[valid], v0[valid], v1[valid]
+
+        # A segment is at most a day long, so it crosses at most one midnight
+        day0 = bucket_start(t0, DAY_MS, self.utc_offset)
+        boundary = day0 + DAY_MS
+        cross = t1 > boundary
+        cut = np.where(cross, boundary, t1)
+        v_cut = v0 if self.step else v0 + (v1 - v0) * (cut - t0) / (t1 - t0)
+        days = np.concatenate((day0, boundary[cross]))
+        areas = np.concatenate((self._area(t0, cut, v0, v_cut),
+                                self._area(cut[cross], t1[cross], v_cut[cross], v1[cross])))
+        covered = np.concatenate((cut - t0, t1[cross] - cut[cross]))
+        if self.day is not None:
+            days = np.append(days, self.day)
+            areas = np.append(areas, self.area)
+            covered = np.append(covered, self.covered_ms)
+
+        unique, inverse = np.unique(days, return_inverse=True)
+        totals = dict(zip(unique.tolist(), zip(np.bincount(inverse, weights=areas).tolist(),
+                                               np.bincount(inverse, weights=covered).astype(np.int64).tolist())))
+        self.day = int(bucket_start(t[-1], DAY_MS, self.utc_offset))
+        self.area, self.covered_ms = totals.pop(self.day, (0.0, 0))
+        self.last_ts, self.last_value = int(t[-1]), float(v[-1])
+        return totals
+
+    def open_day(self):
+        return {} if self.day is None else {self.day: (self.area, self.covered_ms)}
+
+
+def to_table(totals, complete):
+    days = sorted(totals)
+    return pd.DataFrame({
+        'dli': [totals[d][0] / 1e9 for d in days],  # µmol/m²/s x ms -> mol/m²
+        'hours': [totals[d][1] / HOUR_MS for d in days],
+        'complete': complete,
+    }, index=pd.Index(days, dtype='int64', name='time'))
+
+
+def update_table(path, finished, open_day):
+    table = pd.read_csv(path, index_col='time', usecols=['time'] + TABLE_COLUMNS) if os.path.exists(path) else None
+    new = pd.concat([to_table(finished, True), to_table(open_day, False)])
+    if table is not None:
+        new = pd.concat([table[~table.index.isin(new.index)], new]).sort_index()
+    tmp = f"{path}.tmp"
+    new.to_csv(tmp, index_label='time', float_format='%.6g')
+    os.replace(tmp, path)
+    return new
+
+
+def parse_schedule(text):
+    """'06:00-18:00,20:00-22:00' -> [(on, off)] in ms after local midnight"""
+    periods = []
+    for item in text.split(','):
+        on, off = (int(h) * HOUR_MS + int(m) * 60 * 1000
+                   for h, m in (part.strip().split(':') for part in item.split('-')))
+        periods.append((on, off))
+    return periods
+
+
+def schedule_points(start, end, periods, ppfd, utc_offset=DAY_UTC_OFFSET):
+    """Step PPFD samples at every switch and local midnight in [start, end], plus both ends"""
+    # Start a day early so periods running past midnight are on at the first point
+    midnights = np.arange(bucket_start(start, DAY_MS, utc_offset) - DAY_MS, end + DAY_MS, DAY_MS, dtype=np.int64)
+    on = np.concatenate([midnights + p_on for p_on, _ in periods])
+    off = np.concatenate([midnights + p_off + (DAY_MS if p_off <= p_on else 0) for p_on, p_off in periods])
+    points = np.unique(np.concatenate((midnights, on, off, [start, end])))
+    points = points[(points >= start) & (points <= end)]
+    lit = ((points[:, None] >= on) & (points[:, None] < off)).any(axis=1)
+    return points, np.where(lit, float(ppfd), 0.0)
+
+
+def update_measured(dli_state, name=MEASURED):
+    cursor = dli_state.setdefault('cursor', {})
+    integral = DailyIntegral(min(DAY_MS, MAX_GAP_INTERVALS * SERIES[name]['interval_ms']),
+                             state=dli_state.get('integral'))
+    finished = {}
+    for ts, values, _ in read_new(name, cursor):
+        finished.update(integral.extend(ts, values))
+    dli_state['integral'] = integral.state()
+    return finished, integral.open_day()
+
+
+def update_schedule(dli_state, schedule, ppfd, days, now=None):
+    now = int(time.time() * 1000) if now is None else now
+    integral = DailyIntegral(DAY_MS, step=True, state=dli_state.get('integral'))
+    start = integral.last_ts
+    if start is None:
+        start = int(bucket_start(now - days * DAY_MS, DAY_MS, DAY_UTC_OFFSET))
+    finished = integral.extend(*schedule_points(start, now, parse_schedule(schedule), ppfd))
+    dli_state['integral'] = integral.state()
+    dli_state['schedule'] = {'periods': schedule, 'ppfd': ppfd}
+    return finished, integral.open_day()
+
+
+def main(schedule=None, ppfd=SCHEDULE_PPFD, days=0, full=False, state_path=STATE_FILE):
+    name = SCHEDULE_NAME if schedule else MEASURED
+    if not schedule and not os.path.exists(series_path(name)):
+        print(f"⚠️ {name}: {SERIES[name]['path']} not found (use --schedule for LED-derived DLI)")
+        return 0
+
+    os.makedirs(ROLLUP_DIR, exist_ok=True)
+    path = table_path(f"{name}_dli", '1d')
+    state = load_state(state_path)
+    dli_state = state.setdefault('dli', {})
+    if full:
+        dli_state.pop(name, None)
+        if os.path.exists(path):
+            os.remove(path)
+
+    if schedule:
+        finished, open_day = update_schedule(dli_state.setdefault(name, {}), schedule, ppfd, days)
+    else:
+        finished, open_day = update_measured(dli_state.setdefault(name, {}))
+    update_table(path, finished, open_day)
+    save_state(state, state_path)
+
+    print(f"{name}: {len(finished)} days finished")
+    for area, covered in open_day.values():
+        print(f"Today so far: {area / 1e9:.2f} mol/m²/day over {covered / HOUR_MS:.1f} h")
+    print(f"✅ DLI in {os.path.relpath(path, os.path.dirname(ROLLUP_DIR))}")
+    return 0
@@ -0,0 +1,207 @@
+"""
+Incremental data-quality scan over the stored series.
+
+Flags gaps (missed cron runs), flatlines (e.g. EC stuck at 0.0), out-of-range
+values and spikes (|x - rolling median| above k * rolling MAD). Only rows added
+since the previous run are scanned; the little context needed to continue
+runs and rolling windows across runs is kept in series/state.json.
+
+Results are upserted into dq_flags.csv (epoch-ms time/time_end, series, kind,
+value, text) so Grafana can overlay them as annotations.
+
+    python iot_grafana.py quality
+    python iot_grafana.py quality --series bluelab_ec --full
+"""
+import csv
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from series.sources import HOUR_MS, REPO_ROOT, SERIES, STATE_FILE, load_state, read_new, save_state, series_path
+
+FLAGS_FILE = os.path.join(REPO_ROOT, 'dq_flags.csv')
+FLAG_COLUMNS = ['time', 'time_end', 'series', 'kind', 'value', 'text']
+
+# Detection settings; anything not listed falls back to DEFAULTS
+#   gap_factor:      gap when the step exceeds gap_factor * interval_ms
+#   flatline_ms:     identical readings for at least this long
+#   spike_window:    trailing points used for the rolling median/MAD
+#   spike_k:         robust z-score threshold
+#   spike_min_delta: ignore deviations smaller than this (absolute units)
+DEFAULTS = {'gap_factor': 2.5, 'flatline_ms': 24 * HOUR_MS, 'spike_window': 24, 'spike_k': 6.0, 'spike_min_delta': 0.5}
+QUALITY = {
+    'tuya_temperature': {'flatline_ms': 12 * HOUR_MS, 'spike_min_delta': 2.0},
+    'edenic_ph': {'spike_min_delta': 0.3},
+    'edenic_temperature': {'spike_min_delta': 2.0},
+    'edenic_ec': {'spike_min_delta': 0.1},
+    'bluelab_ph': {'flatline_ms': 6 * HOUR_MS, 'spike_window': 36, 'spike_min_delta': 0.3},
+    'bluelab_temperature': {'flatline_ms': 6 * HOUR_MS, 'spike_window': 36, 'spike_min_delta': 2.0},
+    'bluelab_ec': {'flatline_ms': 2 * HOUR_MS, 'spike_window': 36, 'spike_min_delta': 0.1},
+}
+
+MAD_SCALE = 1.4826  # MAD -> standard deviation for normal data
+MEDIAN_ROWS = 65536  # rolling windows evaluated per batch, bounds memory
+
+
+def settings(name):
+    config = dict(DEFAULTS)
+    config.update(QUALITY.get(name, {}))
+    config['interval_ms'] = SERIES[name]['interval_ms']
+    config['valid_range'] = SERIES[name]['valid_range']
+    return config
+
+
+def _runs(mask):
+    """Start/end indices (inclusive) of the True runs in a boolean array"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+
+def _flag(series, kind, start, end, value, text):
+    return {'time': int(start), 'time_end': int(end), 'series': series, 'kind': kind,
+            'value': '' if value is None or np.isnan(value) else round(float(value), 4), 'text': text}
+
+
+def detect_gaps(name, ts, state, config):
+    prev = np.empty_like(ts)
+    prev[1:] = ts[:-1]
+    prev[0] = state.get('last_ts', ts[0])
+    step = ts - prev
+    idx = np.flatnonzero(step > config['gap_factor'] * config['interval_ms'])
+    return [_flag(name, 'gap', prev[i], ts[i], step[i] / HOUR_MS, f"No data for {step[i] / HOUR_MS:.1f} h")
+            for i in idx]
+
+
+def detect_out_of_range(name, ts, values, state, config):
+    lo, hi = config['valid_range']
+    bad = ~((values >= lo) & (values <= hi))  # NaN counts as out of range
+    starts, ends = _runs(bad)
+    start_ts = ts[starts]
+    if starts.size and starts[0] == 0 and 'range_start' in state:
+        start_ts[0] = state['range_start']
+
+    if bad[-1]:
+        state['range_start'] = int(start_ts[-1])
+    else:
+        state.pop('range_start', None)
+    return [_flag(name, 'out_of_range', start_ts[k], ts[ends[k]], values[ends[k]],
+                  f"Outside [{lo}, {hi}] for {ends[k] - starts[k] + 1} readings")
+            for k in range(starts.size)]
+
+
+def detect_flatlines(name, ts, values, state, config):
+    change = np.empty(values.size, dtype=bool)
+    change[0] = True
+    change[1:] = values[1:] != values[:-1]
+    starts = np.flatnonzero(change)
+    ends = np.append(starts[1:] - 1, values.size - 1)
+    start_ts = ts[starts]
+    # Continue the run that was still open at the end of the previous scan
+    if 'flat_start' in state and values[0] == state.get('last_value'):
+        start_ts[0] = state['flat_start']
+    state['flat_start'] = int(start_ts[-1])
+
+    duration = ts[ends] - start_ts
+    idx = np.flatnonzero(duration >= config['flatline_ms'])
+    return [_flag(name, 'flatline', start_ts[k], ts[ends[k]], values[starts[k]],
+                  f"Stuck at {values[starts[k]]} for {duration[k] / HOUR_MS:.1f} h")
+            for k in idx]
+
+
+def detect_spikes(name, ts, values, state, config):
+    window = config['spike_window']
+    tail = np.asarray(state.get('tail', []), dtype=np.float64)
+    history = np.concatenate((tail, values))
+    state['tail'] = [float(v) for v in history[-window:]]
+
+    # Point p of history is judged against the `window` points before it
+    first = max(window, tail.size)
+    if history.size <= first:
+        return []
+    windows = sliding_window_view(history[:-1], window)[first - window:]
+    targets = history[first:]
+    target_ts = ts[first - tail.size:]
+
+    flags = []
+    for lo in range(0, targets.size, MEDIAN_ROWS):
+        win = windows[lo:lo + MEDIAN_ROWS]
+        x = targets[lo:lo + MEDIAN_ROWS]
+        median = np.nanmedian(win, axis=1)
+        mad = np.nanmedian(np.abs(win - median[:, None]), axis=1)
+        deviation = np.abs(x - median)
+        threshold = np.maximum(config['spike_k'] * MAD_SCALE * mad, config['spike_min_delta'])
+        for i in np.flatnonzero(deviation > threshold):
+            t = target_ts[lo + i]
+            flags.append(_flag(name, 'spike', t, t, x[i], f"{x[i]} vs rolling median {median[i]:.3g}"))
+    return flags
+
+
+def scan_chunk(name, ts, values, state, config=None):
+    """Run every detector over one time-sorted chunk, updating `state`"""
+    config = config or settings(name)
+    if 'last_ts' in state:
+        newer = ts > state['last_ts']  # late or repeated rows are not rescanned
+        ts, values = ts[newer], values[newer]
+    if not ts.size:
+        return []
+
+    flags = detect_gaps(name, ts, state, config)
+    flags += detect_out_of_range(name, ts, values, state, config)
+    flags += detect_flatlines(name, ts, values, state, config)
+    flags += detect_spikes(name, ts, values, state, config)
+    state['last_ts'] = int(ts[-1])
+    state['last_value'] = float(values[-1])
+    return flags
+
+
+def load_flags(path=FLAGS_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline='') as f:
+        return {(row['series'], row['kind'], int(row['time'])): row for row in csv.DictReader(f)}
+
+
+def save_flags(flags, path=FLAGS_FILE):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FLAG_COLUMNS)
+        writer.writeheader()
+        for key in sorted(flags, key=lambda k: (int(flags[k]['time']), k[0], k[1])):
+            writer.writerow(flags[key])
+    os.replace(tmp, path)
+
+
+def main(series=None, full=False, flags_path=FLAGS_FILE, state_path=STATE_FILE):
+    names = series or list(SERIES)
+    unknown = set(names) - set(SERIES)
+    if unknown:
+        raise ValueError(f"Unknown series: {sorted(unknown)}")
+
+    state = load_state(state_path)
+    quality_state = state.setdefault('quality', {})
+    flags = load_flags(flags_path)
+
+    for name in names:
+        if not os.path.exists(series_path(name)):
+            print(f"⚠️ {name}: {SERIES[name]['path']} not found")
+            continue
+        if full:
+            quality_state.pop(name, None)
+            flags = {k: v for k, v in flags.items() if k[0] != name}
+
+        series_state = quality_state.setdefault(name, {})
+        cursor = series_state.setdefault('cursor', {})
+        config = settings(name)
+        found = scanned = 0
+        for ts, values, _ in read_new(name, cursor):
+            scanned += ts.size
+            for flag in scan_chunk(name, ts, values, series_state, config):
+                flags[(flag['series'], flag['kind'], flag['time'])] = flag
+                found += 1
+        print(f"{name}: scanned {scanned} new rows, {found} flags")
+
+    save_flags(flags, flags_path)
+    save_state(state, state_path)
+    print(f"✅ {len(flags)} flags in {os.path.relpath(flags_path, REPO_ROOT)}")
+    return 0
@@ -0,0 +1,218 @@
+"""
+Continuous hourly and daily aggregates for every stored series.
+
+Each table keeps mergeable partials per bucket (count, sum, min, max) plus the
+derived mean, so new points are folded in without touching raw history:
+
+* appended rows (Tuya CSV) are merged into their buckets, wherever in time
+  they fall, so late rows are counted once;
+* rewritten files (Edenic pulls, Bluelab exports) replace every hourly bucket
+  they reach, so revised or back-filled points overwrite stale partials; the
+  bucket holding a file's first point keeps the points before it that have
+  left the file (rollup/<series>_snapshot.csv holds the last rows read);
+* daily buckets are re-merged from the hourly partials of the days touched.
+
+Tables are written to rollup/<series>_1h.csv and rollup/<series>_1d.csv with
+epoch-ms bucket starts, for long-range Grafana panels.
+
+    python iot_grafana.py rollup
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from series.sources import HOUR_MS, REPO_ROOT, SERIES, STATE_FILE, load_state, read_new, save_state, series_path
+
+ROLLUP_DIR = os.path.join(REPO_ROOT, 'rollup')
+DAY_MS = 24 * HOUR_MS
+DAY_UTC_OFFSET = 8  # daily buckets start at local (UTC+8) midnight
+PARTIAL_COLUMNS = ['count', 'sum', 'min', 'max']
+
+
+def bucket_start(ts, size_ms, utc_offset=0):
+    shift = int(utc_offset * HOUR_MS)
+    return ts - (ts + shift) % size_ms
+
+
+def partials(ts, values, size_ms, utc_offset=0):
+    """Aggregate time-sorted points into a per-bucket partials frame"""
+    keep = ~np.isnan(values)
+    ts, values = ts[keep], values[keep]
+    if not ts.size:
+        return empty_table()
+    buckets = bucket_start(ts, size_ms, utc_offset)
+    # Points are time-sorted, so each bucket is a contiguous segment
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    return pd.DataFrame({
+        'count': np.diff(np.append(starts, ts.size)),
+        'sum': np.add.reduceat(values, starts),
+        'min': np.minimum.reduceat(values, starts),
+        'max': np.maximum.reduceat(values, starts),
+    }, index=pd.Index(buckets[starts], name='time'))
+
+
+def merge(*tables):
+    """Combine partials; buckets present in several tables are merged"""
+    tables = [t for t in tables if not t.empty]
+    if not tables:
+        return empty_table()
+    combined = pd.concat(tables)
+    if combined.index.is_unique:
+        return combined.sort_index()
+    return combined.groupby(level=0).agg({'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'})
+
+
+def empty_table():
+    return pd.DataFrame({c: pd.Series(dtype='float64') for c in PARTIAL_COLUMNS},
+                        index=pd.Index([], dtype='int64', name='time'))
+
+
+def table_path(name, resolution):
+    return os.path.join(ROLLUP_DIR, f"{name}_{resolution}.csv")
+
+
+def load_table(path):
+    if not os.path.exists(path):
+        return empty_table()
+    return pd.read_csv(path, index_col='time', usecols=['time'] + PARTIAL_COLUMNS, float_precision='round_trip')
+
+
+def save_table(table, path):
+    out = table.copy()
+    out['count'] = out['count'].astype(np.int64)
+    out['mean'] = out['sum'] / out['count']
+    tmp = f"{path}.tmp"
+    # Full precision: sum/min/max are read back and merged on every run
+    out.to_csv(tmp, index_label='time')
+    os.replace(tmp, path)
+
+
+def load_snapshot(path):
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path, float_precision='round_trip')
+    return df['time'].to_numpy(dtype=np.int64), df['value'].to_numpy(dtype=np.float64)
+
+
+def save_snapshot(snapshot, path):
+    ts, values = snapshot
+    tmp = f"{path}.tmp"
+    pd.DataFrame({'time': ts, 'value': values}).to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def apply_snapshot(hourly, snapshot, previous_watermark, previous=None, head=None):
+    """
+    Fold a re-read file into the hourly table. Every bucket from the one holding
+    the snapshot's first point to the one holding its last is rebuilt from the
+    snapshot rows. The first of them may straddle the snapshot start; its points
+    from before the start are no longer in the file, so they come from `head`
+    (what that bucket held before the previous snapshot) and the previous
+    snapshot's rows. Returns the table, the touched buckets and the new head.
+    """
+    ts, values = snapshot
+    if not ts.size:
+        return hourly, np.empty(0, dtype=np.int64), head
+    first_bucket = bucket_start(ts[0], HOUR_MS)
+    last_bucket = bucket_start(ts[-1], HOUR_MS)
+
+    kept = []
+    if head is not None and head['time'] == first_bucket and head['before'] <= ts[0]:
+        kept.append(pd.DataFrame({c: [head[c]] for c in PARTIAL_COLUMNS},
+                                 index=pd.Index([first_bucket], name='time')))
+    if previous is not None:
+        earlier = (previous[0] >= first_bucket) & (previous[0] < ts[0])
+        kept.append(partials(previous[0][earlier], previous[1][earlier], HOUR_MS))
+    elif previous_watermark is not None and previous_watermark < ts[0] and first_bucket in hourly.index:
+        # Tables built before snapshots were saved: the stored bucket predates the file
+        kept.append(hourly.loc[[first_bucket]])
+    before = merge(*kept)
+
+    stale = (hourly.index >= first_bucket) & (hourly.index <= last_bucket)
+    rebuilt = partials(ts, values, HOUR_MS)
+    touched = np.concatenate((hourly.index[stale].to_numpy(), before.index.to_numpy(), rebuilt.index.to_numpy()))
+    head = None
+    if not before.empty:
+        head = {'time': int(first_bucket), 'before': int(ts[0]),
+                **{c: float(before[c].iloc[0]) for c in PARTIAL_COLUMNS}}
+    return merge(hourly[~stale], before, rebuilt), touched, head
+
+
+def update_series(name, series_state):
+    cursor = series_state.setdefault('cursor', {})
+    previous_watermark = cursor.get('watermark')
+    hourly = load_table(table_path(name, '1h'))
+
+    deltas, rows, snapshot_ts, snapshot_values = [], None, [], []
+    for ts, values, snapshot in read_new(name, cursor, since_watermark=False):
+        if snapshot:
+            snapshot_ts.append(ts)
+            snapshot_values.append(values)
+        else:
+            deltas.append(partials(ts, values, HOUR_MS))
+
+    touched = [np.concatenate([d.index.to_numpy() for d in deltas])] if deltas else []
+    hourly = merge(hourly, *deltas)
+    if snapshot_ts:
+        ts = np.concatenate(snapshot_ts)
+        values = np.concatenate(snapshot_values)
+        order = np.argsort(ts, kind='stable')
+        rows = (ts[order], values[order])
+        hourly, snapshot_touched, head = apply_snapshot(
+            hourly, rows, previous_watermark, load_snapshot(table_path(name, 'snapshot')),
+            series_state.get('head'))
+        touched.append(snapshot_touched)
+        if head is None:
+            series_state.pop('head', None)
+        else:
+            series_state['head'] = head
+
+    if not touched:
+        return 0
+    hours = np.unique(np.concatenate(touched)).astype(np.int64)
+    if not hours.size:
+        return 0
+
+    # Re-derive only the days whose hours changed, from mergeable hourly partials
+    days = np.unique(bucket_start(hours, DAY_MS, DAY_UTC_OFFSET))
+    daily = load_table(table_path(name, '1d'))
+    hour_days = bucket_start(hourly.index.to_numpy(), DAY_MS, DAY_UTC_OFFSET)
+    affected = hourly[np.isin(hour_days, days)]
+    recomputed = affected.groupby(bucket_start(affected.index.to_numpy(), DAY_MS, DAY_UTC_OFFSET)).agg(
+        {'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'})
+    recomputed.index.name = 'time'
+    daily = merge(daily[~daily.index.isin(days)], recomputed)
+
+    save_table(hourly, table_path(name, '1h'))
+    save_table(daily, table_path(name, '1d'))
+    if rows is not None:
+        save_snapshot(rows, table_path(name, 'snapshot'))
+    return hours.size
+
+
+def main(series=None, full=False, state_path=STATE_FILE):
+    names = series or list(SERIES)
+    unknown = set(names) - set(SERIES)
+    if unknown:
+        raise ValueError(f"Unknown series: {sorted(unknown)}")
+
+    os.makedirs(ROLLUP_DIR, exist_ok=True)
+    state = load_state(state_path)
+    rollup_state = state.setdefault('rollup', {})
+
+    for name in names:
+        if not os.path.exists(series_path(name)):
+            print(f"⚠️ {name}: {SERIES[name]['path']} not found")
+            continue
+        if full:
+            rollup_state.pop(name, None)
+            for resolution in ('1h', '1d', 'snapshot'):
+                if os.path.exists(table_path(name, resolution)):
+                    os.remove(table_path(name, resolution))
+        hours = update_series(name, rollup_state.setdefault(name, {}))
+        print(f"{name}: {hours} hourly buckets updated")
+        save_state(state, state_path)
+
+    print(f"✅ Rollups in {os.path.relpath(ROLLUP_DIR, REPO_ROOT)}/")
+    return 0
@@ -0,0 +1,196 @@
+"""
+Grafana JSON datasource over the stored CSV series, no InfluxDB upload needed.
+
+    python iot_grafana.py serve --port 8081
+
+Endpoints (JSON datasource and Infinity plugins):
+
+    GET  /                    health check
+    POST /search, /metrics    series names
+    POST /query               {"range": {"from", "to"}, "intervalMs", "targets": [{"target"}]}
+                              -> [{"target", "datapoints": [[value, ms], ...]}]
+    GET  /series/<name>?from=&to=&step=&agg=
+                              -> [{"time": ms, "value": v}, ...] (Infinity)
+
+Times are epoch ms or ISO strings. A series is parsed once per file version
+and kept as NumPy arrays; aggregated results go to an LRU keyed by (series,
+range, step, agg), with the range snapped outward to the step grid so every
+refresh within the same step is a cache hit. Each request stats the file, and
+a changed size or mtime drops that series' arrays and results. A registered
+series whose file does not exist yet is empty, and /query answers a target it
+cannot serve with an 'error' and no datapoints instead of failing the panel.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+
+from series.rollup import partials
+from series.sources import SERIES, read_series, series_path
+
+SERVER_PORT = 8081
+CACHE_SIZE = 256  # aggregated results kept
+AGGREGATES = ('mean', 'min', 'max', 'sum', 'count')
+
+
+def parse_time(value):
+    """Epoch ms (number or digit string) or ISO 8601 text -> int ms"""
+    if isinstance(value, (int, float)) or str(value).lstrip('-').isdigit():
+        return int(value)
+    return int(np.datetime64(str(value).rstrip('Z'), 'ms').astype(np.int64))
+
+
+class SeriesCache:
+    """Parsed series per file version plus an LRU of aggregated query results"""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.arrays = {}  # name -> (fingerprint, ts, values)
+        self.results = OrderedDict()
+        self.hits = self.misses = 0
+
+    def _arrays(self, name):
+        stat = os.stat(series_path(name))
+        fingerprint = (stat.st_size, stat.st_mtime_ns)
+        cached = self.arrays.get(name)
+        if cached is not None and cached[0] == fingerprint:
+            return cached
+        ts, values = read_series(name)
+        keep = ~np.isnan(values)
+        self.arrays[name] = cached = (fingerprint, ts[keep], values[keep])
+        for stale in [k for k in self.results if k[0] == name]:
+            del self.results[stale]
+        return cached
+
+    def query(self, name, start, end, step=0, agg='mean'):
+        """
+        (times, values) of a series over [start, end], in step-ms buckets if
+        step is coarser than its sampling; empty if its file does not exist yet
+        """
+        if name not in SERIES:
+            raise KeyError(name)
+        if agg not in AGGREGATES:
+            raise ValueError(f"agg must be one of {AGGREGATES}")
+        step = max(int(step or 0), 0)
+        if step <= SERIES[name]['interval_ms']:
+            step, agg = 0, 'raw'
+        else:
+            start, end = start - start % step, end + (-end % step)
+        key = (name, start, end, step, agg)
+        with self.lock:
+            try:
+                _, ts, values = self._arrays(name)
+            except FileNotFoundError:
+                # Registered but not written yet (e.g. before the first pull)
+                self.arrays.pop(name, None)
+                for stale in [k for k in self.results if k[0] == name]:
+                    del self.results[stale]
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+            if key in self.results:
+                self.results.move_to_end(key)
+                self.hits += 1
+                return self.results[key]
+            self.misses += 1
+            lo, hi = np.searchsorted(ts, start, side='left'), np.searchsorted(ts, end, side='right')
+            ts, values = ts[lo:hi], values[lo:hi]
+            if step:
+                table = partials(ts, values, step)
+                column = table['sum'] / table['count'] if agg == 'mean' else table[agg]
+                ts, values = table.index.to_numpy(dtype=np.int64), column.to_numpy(dtype=np.float64)
+            self.results[key] = result = (ts, values)
+            while len(self.results) > self.size:
+                self.results.popitem(last=False)
+            return result
+
+
+def make_handler(cache):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, payload, status=200):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'{}')
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type, Accept')
+            self.end_headers()
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path in ('', '/'):
+                return self._send({'status': 'ok', 'cache': {'hits': cache.hits, 'misses': cache.misses}})
+            if not url.path.startswith('/series/'):
+                return self._send({'error': 'not found'}, 404)
+            name = unquote(url.path[len('/series/'):])
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                ts, values = cache.query(name, parse_time(params.get('from', 0)),
+                                         parse_time(params.get('to', np.iinfo(np.int64).max)),
+                                         int(params.get('step', 0)), params.get('agg', 'mean'))
+            except KeyError:
+                return self._send({'error': f"unknown series {name}"}, 404)
+            except ValueError as e:
+                return self._send({'error': str(e)}, 400)
+            self._send([{'time': t, 'value': v} for t, v in zip(ts.tolist(), values.tolist())])
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            if path in ('/search', '/metrics'):
+                return self._send(sorted(n for n in SERIES if os.path.exists(series_path(n))))
+            if path != '/query':
+                return self._send({'error': 'not found'}, 404)
+            try:
+                request = self._body()
+                start = parse_time(request['range']['from'])
+                end = parse_time(request['range']['to'])
+                step = int(request.get('intervalMs', 0))
+            except KeyError as e:
+                return self._send({'error': f"missing field {e}"}, 400)
+            except ValueError as e:
+                return self._send({'error': str(e)}, 400)
+            out = []
+            for target in request.get('targets', []):
+                name = target.get('target')
+                if not name or target.get('hide'):
+                    continue
+                agg = (target.get('payload') or {}).get('agg', 'mean')
+                entry = {'target': name, 'refId': target.get('refId'), 'datapoints': []}
+                # One bad target leaves the rest of the panel intact
+                try:
+                    ts, values = cache.query(name, start, end, step, agg)
+                    entry['datapoints'] = [[v, t] for t, v in zip(ts.tolist(), values.tolist())]
+                except KeyError:
+                    entry['error'] = f"unknown series {name}"
+                except ValueError as e:
+                    entry['error'] = str(e)
+                out.append(entry)
+            self._send(out)
+
+    return Handler
+
+
+def main(host='0.0.0.0', port=SERVER_PORT, cache_size=CACHE_SIZE):
+    server = ThreadingHTTPServer((host, port), make_handler(SeriesCache(cache_size)))
+    print(f"✅ Serving {len(SERIES)} series on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Server stopped")
+    finally:
+        server.server_close()
+    return 0
@@ -0,0 +1,184 @@
+"""
+Registry of the stored CSV series and an incremental reader over them.
+
+Every series is returned as two aligned NumPy arrays: int64 epoch
+milliseconds (UTC) and float64 values, sorted by time. Files are stored with
+an epoch-ms 'time' column; unmigrated ones are parsed with their explicit
+legacy layout (series/timestamps.py).
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from series.timestamps import to_epoch_ms
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_FILE = os.path.join(REPO_ROOT, 'series', 'state.json')
+
+HOUR_MS = 60 * 60 * 1000
+PREFIX_BYTES = 64 * 1024
+
+# name -> where the series lives and how to read it
+#   column:       value column index (0 is the timestamp column)
+#   legacy:       timestamp layout (series/timestamps.py) of the file before migration;
+#                 files whose first column is 'time' hold epoch ms and skip it
+#   append_only:  writer only ever appends (tuya_csv); otherwise the file is rewritten
+#   interval_ms:  expected sampling interval
+#   valid_range:  physically plausible values
+SERIES = {
+    'tuya_temperature': {
+        'path': 'tuya/device.csv', 'column': 1, 'legacy': 'tuya', 'append_only': True,
+        'interval_ms': HOUR_MS, 'valid_range': (0, 45),
+    },
+    'edenic_ph': {
+        'path': 'edenic_ph.csv', 'column': 1, 'legacy': 'edenic', 'append_only': False,
+        'interval_ms': 3 * HOUR_MS, 'valid_range': (0, 14),
+    },
+    'edenic_temperature': {
+        'path': 'edenic_temperature.csv', 'column': 1, 'legacy': 'edenic', 'append_only': False,
+        'interval_ms': 3 * HOUR_MS, 'valid_range': (0, 45),
+    },
+    'edenic_ec': {
+        'path': 'edenic_electrical_conductivity.csv', 'column': 1, 'legacy': 'edenic', 'append_only': False,
+        'interval_ms': 3 * HOUR_MS, 'valid_range': (0.01, 10),
+    },
+    'bluelab_ph': {
+        'path': 'edenic_v1/export.csv', 'column': 1, 'legacy': 'bluelab', 'append_only': False,
+        'interval_ms': 20 * 60 * 1000, 'valid_range': (0, 14),
+    },
+    'bluelab_temperature': {
+        'path': 'edenic_v1/export.csv', 'column': 2, 'legacy': 'bluelab', 'append_only': False,
+        'interval_ms': 20 * 60 * 1000, 'valid_range': (0, 45),
+    },
+    'bluelab_ec': {
+        'path': 'edenic_v1/export.csv', 'column': 3, 'legacy': 'bluelab', 'append_only': False,
+        'interval_ms': 20 * 60 * 1000, 'valid_range': (0.01, 10),
+    },
+    'ppfd': {
+        'path': 'ppfd.csv', 'column': 1, 'legacy': None, 'append_only': True,
+        'interval_ms': 5 * 60 * 1000, 'valid_range': (0, 3000),
+    },
+    'mussel_carbon': {
+        'path': 'musselc.csv', 'column': 1, 'legacy': 'date', 'append_only': False,
+        'interval_ms': 24 * HOUR_MS, 'valid_range': (0, 1e6),
+    },
+}
+
+
+def series_path(name):
+    return os.path.join(REPO_ROOT, SERIES[name]['path'])
+
+
+def _parse_frame(df, source, header):
+    """Turn a raw (time, value...) frame into sorted int64 ms / float64 arrays"""
+    if df.empty:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    ts, valid = to_epoch_ms(df.iloc[:, 0].to_numpy(), header, source['legacy'])
+    values = pd.to_numeric(df.iloc[:, source['column']], errors='coerce').to_numpy(dtype=np.float64)
+
+    ts, values = ts[valid], values[valid]
+    order = np.argsort(ts, kind='stable')
+    return ts[order], values[order]
+
+
+def _read_bytes(raw, source, header):
+    if not raw.strip():
+        return _parse_frame(pd.DataFrame(), source, header)
+    df = pd.read_csv(io.BytesIO(raw), header=None, names=range(len(header)), dtype=str, keep_default_na=False)
+    return _parse_frame(df, source, header)
+
+
+def _header(header_line):
+    return next(csv.reader([header_line.decode('utf-8-sig')]))
+
+
+def read_series(name):
+    """Read a whole series"""
+    source = SERIES[name]
+    with open(series_path(name), 'rb') as f:
+        header_line = f.readline()
+        return _read_bytes(f.read(), source, _header(header_line))
+
+
+def load_state(path=STATE_FILE):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state, path=STATE_FILE):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def read_new(name, cursor, chunk_bytes=8 * 1024 * 1024, since_watermark=True):
+    """
+    Yield (ts, values, snapshot) chunks that were added since `cursor` and
+    update the cursor dict in place.
+
+    Append-only files resume from the byte offset stored in the cursor, as
+    long as the already-read prefix is unchanged; those chunks are deltas
+    (snapshot=False). Rewritten files are only re-read when their size/mtime
+    changed, as a single time-sorted chunk with snapshot=True. Snapshots are
+    cut to rows newer than the cursor's watermark unless since_watermark is
+    False, in which case the caller gets the whole file to reconcile itself.
+    """
+    source = SERIES[name]
+    path = series_path(name)
+    stat = os.stat(path)
+    if not source['append_only']:
+        chunk_bytes = stat.st_size + 1
+    fingerprint = [stat.st_size, stat.st_mtime_ns]
+    if cursor.get('fingerprint') == fingerprint:
+        return
+
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        header = _header(header_line)
+        offset = cursor.get('offset', 0)
+        prefix = _prefix_hash(f, offset)
+        resume = (source['append_only'] and 0 < offset <= stat.st_size
+                  and prefix == cursor.get('prefix_hash'))
+        if not resume:
+            offset = len(header_line)
+        watermark = None if resume or not since_watermark else cursor.get('watermark')
+
+        f.seek(offset)
+        pending = b''
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                if source['append_only'] or not pending:
+                    break
+                # A rewritten file is complete even without a final newline
+                block, pending = pending, b''
+            else:
+                block = pending + block
+                cut = block.rfind(b'\n') + 1
+                # Keep a trailing partial line (a writer mid-append) for the next read
+                pending, block = block[cut:], block[:cut]
+            offset += len(block)
+            ts, values = _read_bytes(block, source, header)
+            if watermark is not None:
+                newer = ts > watermark
+                ts, values = ts[newer], values[newer]
+            if ts.size:
+                cursor['watermark'] = int(max(cursor.get('watermark') or ts[-1], ts[-1]))
+                yield ts, values, not resume
+
+        cursor['offset'] = offset
+        cursor['prefix_hash'] = _prefix_hash(f, offset)
+    cursor['fingerprint'] = fingerprint if not pending else None
+
+
+def _prefix_hash(f, offset):
+    f.seek(0)
+    return hashlib.sha1(f.read(min(offset, PREFIX_BYTES))).hexdigest()
@@ -0,0 +1,207 @@
+"""
+Canonical time layer: every stored CSV keeps its time in a first column
+named 'time' holding int64 epoch milliseconds (UTC).
+
+Files written before this (and vendor exports dropped in by hand) use one of
+the legacy layouts below. Each has explicit strftime formats and a UTC
+offset; nothing is inferred. Fixed-width formats are parsed without pandas:
+the strings are viewed as a (rows x width) byte matrix, digit fields are
+sliced out by position and combined into epoch ms, with the field layout of
+each (format, width) computed once. Rows that do not fit a layout (odd
+widths, padding, stray text) fall back to pandas with the same explicit format.
+
+    python iot_grafana.py migrate-timestamps --dry-run
+    python iot_grafana.py migrate-timestamps
+"""
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIME_COLUMN = 'time'
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+
+# legacy layout -> (formats tried in order, hours to subtract to get UTC)
+LEGACY_FORMATS = {
+    'tuya': (('%Y/%m/%d %H:%M',), 8),                                   # tuya_csv.py, UTC+8
+    'edenic': (('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S'), 0),       # pull_csv.py, naive UTC
+    'bluelab': (('%d/%m/%Y, %H:%M',), 8),                               # Bluelab export, local time
+    'date': (('%Y-%m-%d',), 8),                                         # musselc.py local dates
+}
+
+# stored file -> its legacy layout, for the one-time migration
+LEGACY_FILES = {
+    'tuya/device.csv': 'tuya',
+    'edenic_ph.csv': 'edenic',
+    'edenic_temperature.csv': 'edenic',
+    'edenic_electrical_conductivity.csv': 'edenic',
+    'edenic_v1/export.csv': 'bluelab',
+    'edenic_v1/export_mod.csv': 'bluelab',
+    'edenic_v1/edenic1_ph.csv': 'edenic',
+    'edenic_v1/edenic1_temp.csv': 'bluelab',
+    'edenic_v1/edenic1_ec.csv': 'bluelab',
+    'musselc.csv': 'date',
+}
+
+FIELD_WIDTHS = {'Y': 4, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2, 'f': 3}  # %f: milliseconds as written by pandas
+FIELD_MS = {'H': HOUR_MS, 'M': 60 * 1000, 'S': 1000, 'f': 1}
+MONTH_DAYS = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def is_canonical(header):
+    """True for a header (list of column names) whose first column is epoch ms"""
+    return bool(header) and header[0].strip().lstrip('\ufeff') == TIME_COLUMN
+
+
+@functools.lru_cache(maxsize=None)
+def layout(fmt):
+    """(width, {field: (start, end)}, [(position, literal byte)]) of a fixed-width format, or None"""
+    fields, literals, pos, i = {}, [], 0, 0
+    while i < len(fmt):
+        if fmt[i] == '%':
+            code = fmt[i + 1]
+            if code not in FIELD_WIDTHS:
+                return None
+            fields[code] = (pos, pos + FIELD_WIDTHS[code])
+            pos += FIELD_WIDTHS[code]
+            i += 2
+        else:
+            literals.append((pos, ord(fmt[i])))
+            pos += 1
+            i += 1
+    return pos, fields, literals
+
+
+def _parse_fixed(chars, fmt):
+    """Epoch ms (as written, before any UTC offset) and validity of a (rows x width) byte matrix"""
+    _, fields, literals = layout(fmt)
+    ok = np.ones(len(chars), dtype=bool)
+    for pos, byte in literals:
+        ok &= chars[:, pos] == byte
+    values = {}
+    for code, (start, end) in fields.items():
+        digits = chars[:, start:end].astype(np.int64) - 48
+        ok &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+        values[code] = digits @ (10 ** np.arange(end - start - 1, -1, -1))
+    year = values['Y']
+    month = values.get('m', np.ones_like(year))
+    day = values.get('d', np.ones_like(year))
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    ok &= (month >= 1) & (month <= 12) & (day >= 1)
+    ok &= day <= MONTH_DAYS[np.clip(month, 1, 12)] + (leap & (month == 2))
+    ms = days_from_civil(year, month, day) * DAY_MS
+    for code, unit in FIELD_MS.items():
+        if code in values:
+            ms += values[code] * unit
+    return ms, ok
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 of proleptic Gregorian dates (integer arrays)"""
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    return era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468
+
+
+def parse_times(texts, formats, utc_offset=0):
+    """
+    (int64 epoch ms UTC, valid mask) for timestamp strings in explicit
+    formats; invalid entries are 0.
+    """
+    texts = np.asarray(texts)
+    try:
+        raw = texts.astype(np.bytes_)
+    except UnicodeEncodeError:
+        raw = np.char.encode(texts.astype(str), 'ascii', 'replace')
+    ms = np.zeros(raw.size, dtype=np.int64)
+    valid = np.zeros(raw.size, dtype=bool)
+    chars = raw.view(np.uint8).reshape(texts.size, raw.itemsize)
+    lengths = np.count_nonzero(chars, axis=1)
+    for fmt in formats:
+        spec = layout(fmt)
+        if spec is None or spec[0] > chars.shape[1]:
+            continue
+        rows = np.flatnonzero(~valid & (lengths == spec[0]))
+        if rows.size:
+            parsed, ok = _parse_fixed(chars[rows, :spec[0]], fmt)
+            ms[rows[ok]] = parsed[ok]
+            valid[rows[ok]] = True
+    rest = np.flatnonzero(~valid & (lengths > 0))
+    for fmt in formats:
+        if not rest.size:
+            break
+        times = pd.to_datetime(pd.Series(texts[rest]).str.strip(), format=fmt, errors='coerce')
+        ok = times.notna().to_numpy()
+        ms[rest[ok]] = times[ok].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        valid[rest[ok]] = True
+        rest = rest[~ok]
+    ms[valid] -= int(utc_offset * HOUR_MS)
+    return ms, valid
+
+
+def parse_epoch(texts):
+    """(int64 epoch ms, valid mask) for a canonical time column"""
+    values = pd.to_numeric(pd.Series(np.asarray(texts, dtype=str)), errors='coerce')
+    valid = values.notna().to_numpy()
+    return np.where(valid, values.fillna(0), 0).astype(np.int64), valid
+
+
+def to_epoch_ms(texts, header, legacy):
+    """Time column -> (epoch ms, valid): canonical by header (or with no legacy layout), else legacy"""
+    if legacy is None or is_canonical(header):
+        return parse_epoch(texts)
+    formats, utc_offset = LEGACY_FORMATS[legacy]
+    return parse_times(texts, formats, utc_offset)
+
+
+def migrate_file(path, legacy, dry_run=False, utc_offset=None):
+    """
+    Rewrite one legacy CSV with an epoch-ms 'time' column (utc_offset
+    overrides the layout's); returns rows converted, None if already canonical.
+    """
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, skip_blank_lines=True)
+    if is_canonical(list(df.columns)):
+        return None
+    formats, default_offset = LEGACY_FORMATS[legacy]
+    ms, valid = parse_times(df.iloc[:, 0].to_numpy(), formats,
+                            default_offset if utc_offset is None else utc_offset)
+    if not valid.all():
+        bad = df.iloc[np.flatnonzero(~valid)[:3], 0].tolist()
+        raise ValueError(f"{path}: {np.count_nonzero(~valid)} timestamps do not match {legacy} formats, e.g. {bad}")
+    if not dry_run:
+        df.iloc[:, 0] = ms.astype(str)
+        df.columns = [TIME_COLUMN] + list(df.columns[1:])
+        tmp = f"{path}.tmp"
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+    return len(df)
+
+
+def main(paths=None, dry_run=False):
+    failed = 0
+    for rel in paths or list(LEGACY_FILES):
+        path = os.path.join(REPO_ROOT, rel) if not os.path.isabs(rel) else rel
+        legacy = LEGACY_FILES.get(os.path.relpath(path, REPO_ROOT).replace(os.sep, '/'))
+        if legacy is None:
+            print(f"❌ {rel}: no legacy layout registered")
+            failed += 1
+            continue
+        if not os.path.exists(path):
+            print(f"⚠️ {rel}: not found")
+            continue
+        try:
+            rows = migrate_file(path, legacy, dry_run)
+        except ValueError as e:
+            print(f"❌ {e}")
+            failed += 1
+            continue
+        if rows is None:
+            print(f"{rel}: already epoch ms")
+        else:
+            print(f"{'Would migrate' if dry_run else '✅ Migrated'} {rel}: {rows} rows ({legacy})")
+    return 1 if failed else 0
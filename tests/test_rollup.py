@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from series import rollup
+from series.sources import HOUR_MS, SERIES
+
+MINUTE_MS = 60 * 1000
+BUCKET = 1757556000000  # an hour boundary
+
+
+@pytest.fixture
+def ph_file(tmp_path, monkeypatch):
+    path = tmp_path / 'edenic_ph.csv'
+    monkeypatch.setitem(SERIES['edenic_ph'], 'path', str(path))
+    monkeypatch.setattr(rollup, 'ROLLUP_DIR', str(tmp_path))
+    mtime = [1_700_000_000_000_000_000]
+
+    def write(rows):
+        path.write_text('time,ph\n' + ''.join(f"{ts},{value}\n" for ts, value in rows))
+        # A rewrite of the same size must still look changed to read_new
+        mtime[0] += 10 ** 9
+        os.utime(path, ns=(mtime[0], mtime[0]))
+    return write
+
+
+def hour(state, name='edenic_ph'):
+    rollup.update_series(name, state)
+    table = rollup.load_table(rollup.table_path(name, '1h'))
+    return table.loc[BUCKET].to_dict(), table
+
+
+def test_rewritten_value_in_first_snapshot_hour(ph_file):
+    state = {}
+    ph_file([(BUCKET + 10 * MINUTE_MS, 7.0), (BUCKET + 30 * MINUTE_MS, 7.1), (BUCKET + 90 * MINUTE_MS, 7.5)])
+    first, _ = hour(state)
+    assert first == {'count': 2, 'sum': 14.1, 'min': 7.0, 'max': 7.1}
+
+    # The window slid past 7.0; 7.1 was revised and a late 9.0 arrived in the same hour
+    ph_file([(BUCKET + 30 * MINUTE_MS, 8.0), (BUCKET + 40 * MINUTE_MS, 9.0), (BUCKET + 90 * MINUTE_MS, 7.5)])
+    first, table = hour(state)
+    assert first == {'count': 3, 'sum': 24.0, 'min': 7.0, 'max': 9.0}
+    assert table.loc[BUCKET + HOUR_MS, 'sum'] == 7.5
+
+    # Same window, first point revised again
+    ph_file([(BUCKET + 30 * MINUTE_MS, 8.5), (BUCKET + 40 * MINUTE_MS, 9.0), (BUCKET + 90 * MINUTE_MS, 7.5)])
+    first, _ = hour(state)
+    assert first == {'count': 3, 'sum': 24.5, 'min': 7.0, 'max': 9.0}
+
+
+def test_snapshot_covering_the_bucket_replaces_it(ph_file):
+    state = {}
+    ph_file([(BUCKET + 10 * MINUTE_MS, 7.0), (BUCKET + 30 * MINUTE_MS, 7.1)])
+    hour(state)
+    ph_file([(BUCKET, 6.0), (BUCKET + 30 * MINUTE_MS, 8.0)])
+    first, _ = hour(state)
+    assert first == {'count': 2, 'sum': 14.0, 'min': 6.0, 'max': 8.0}
@@ -0,0 +1,182 @@
+"""
+Fleet registry: metadata of every device in the Tuya cloud project, cached
+locally so pollers tag and scale readings without calling the device APIs.
+
+    python iot_grafana.py tuya-devices            # refresh if older than the TTL, then list
+    python iot_grafana.py tuya-devices --force
+    python iot_grafana.py tuya-devices --quiet    # counts only (CI logs)
+
+Only tuya-devices talks to the API; pollers read tuya/devices.json as it is
+and never refresh it, so a reading costs no extra request. In CI the file is
+kept between runs with actions/cache and refreshed by a tuya-devices step
+before the poll, which re-pages the fleet only once the TTL has passed.
+
+The device list is paged in one pass (PAGE_SIZE per request). Specifications
+are shared by every device of a product, so they are fetched once per new
+product rather than per device. Each refresh is diffed against the cached
+copy and reports added, removed and changed devices. The store records when
+it was fetched (epoch ms).
+"""
+import json
+import os
+import time
+
+REGISTRY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'devices.json')
+TTL = int(os.getenv('TUYA_REGISTRY_TTL', 6 * 3600))  # seconds; names and specs rarely change
+PAGE_SIZE = 100
+DEVICES_ENDPOINT = "/v1.0/iot-01/associated-users/devices"
+
+# device fields kept in the registry (and compared for changes)
+FIELDS = ['name', 'category', 'online', 'product_id', 'product_name', 'ip', 'lat', 'lon', 'time_zone']
+
+
+class DeviceRegistry:
+    def __init__(self, path=REGISTRY_FILE, ttl=TTL, api=None):
+        self.path = path
+        self.ttl = ttl
+        self.api = api
+        self.fetched_at = 0
+        self.devices = {}
+        self.products = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                stored = json.load(f)
+            self.fetched_at = stored.get('fetched_at', 0)
+            self.devices = stored.get('devices', {})
+            self.products = stored.get('products', {})
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'fetched_at': self.fetched_at, 'devices': self.devices, 'products': self.products},
+                      f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    @property
+    def stale(self):
+        return time.time() * 1000 - self.fetched_at > self.ttl * 1000
+
+    def _client(self):
+        if self.api is None:
+            try:
+                from tuya.tuya_device import TuyaCloudAPI
+            except ImportError:  # run from inside tuya/
+                from tuya_device import TuyaCloudAPI
+            self.api = TuyaCloudAPI()
+        return self.api
+
+    def _fetch_devices(self):
+        """Every device of the project, following last_row_key until has_more is false"""
+        devices, last_row_key = [], None
+        while True:
+            query = {'size': str(PAGE_SIZE)}
+            if last_row_key:
+                query['last_row_key'] = last_row_key
+            result = self._client().request(DEVICES_ENDPOINT, query)
+            if not result.get('success'):
+                raise Exception(f"Device list failed: {result.get('msg', 'Unknown error')} ({result.get('code')})")
+            page = result.get('result') or {}
+            devices += page.get('devices') or []
+            next_key = page.get('last_row_key')
+            if not page.get('has_more') or not next_key or next_key == last_row_key:
+                return devices
+            last_row_key = next_key
+
+    def _fetch_specs(self, device_id):
+        result = self._client().request(f"/v1.0/devices/{device_id}/specifications")
+        if not result.get('success'):
+            print(f"⚠️ No specifications for {device_id}: {result.get('msg', 'Unknown error')}")
+            return None
+        return result.get('result')
+
+    def refresh(self, force=False):
+        """Re-page the fleet if the cache is stale (or forced); returns the changes found"""
+        if not force and not self.stale:
+            return []
+        devices = {d['id']: {k: d.get(k) for k in FIELDS} for d in self._fetch_devices()}
+        for device_id, device in devices.items():
+            product = device['product_id'] or device['category']
+            if product and product not in self.products:
+                specs = self._fetch_specs(device_id)
+                if specs is not None:
+                    self.products[product] = specs
+
+        changes = diff(self.devices, devices)
+        now = int(time.time() * 1000)
+        for device_id, kind, _ in changes:
+            if kind != 'removed':
+                devices[device_id]['changed_at'] = now
+        for device_id, device in devices.items():
+            device.setdefault('changed_at', self.devices.get(device_id, {}).get('changed_at', now))
+        self.devices = devices
+        self.fetched_at = now
+        self.save()
+        return changes
+
+    def get(self, device_id):
+        return self.devices.get(device_id, {})
+
+    def tags(self, device_id):
+        """Output tags for a device, straight from the cache"""
+        device = self.devices.get(device_id, {})
+        return {k: device[key] for k, key in (('device_name', 'name'), ('category', 'category')) if device.get(key)}
+
+    def specs(self, device_id):
+        device = self.get(device_id)
+        return self.products.get(device.get('product_id') or device.get('category'))
+
+    def scale(self, device_id, code, default=1):
+        """Decimal places of an integer status code per the cached specification (value / 10**scale)"""
+        for status in (self.specs(device_id) or {}).get('status') or []:
+            if status.get('code') == code:
+                try:
+                    return int(json.loads(status.get('values') or '{}').get('scale', default))
+                except (TypeError, ValueError):
+                    return default
+        return default
+
+
+def cached_registry(device_id=None):
+    """The stored registry for pollers: read as is, never refreshed"""
+    registry = DeviceRegistry()
+    if device_id and device_id not in registry.devices:
+        print("⚠️ Device not in tuya/devices.json (run `python iot_grafana.py tuya-devices`); using defaults")
+    return registry
+
+
+def diff(old, new):
+    """[(device_id, 'added' | 'removed' | 'changed', {field: (old, new)})]"""
+    changes = []
+    for device_id in sorted(set(old) | set(new)):
+        if device_id not in old:
+            changes.append((device_id, 'added', {}))
+        elif device_id not in new:
+            changes.append((device_id, 'removed', {}))
+        else:
+            fields = {k: (old[device_id].get(k), new[device_id][k]) for k in FIELDS
+                      if old[device_id].get(k) != new[device_id][k]}
+            if fields:
+                changes.append((device_id, 'changed', fields))
+    return changes
+
+
+def main(force=False, ttl=TTL, quiet=False, api=None):
+    registry = DeviceRegistry(ttl=ttl, api=api)
+    try:
+        changes = registry.refresh(force)
+    except Exception as e:
+        print(f"❌ {e}")
+        return 1
+    age = time.time() - registry.fetched_at / 1000
+    if quiet:
+        print(f"✅ {len(registry.devices)} devices, {len(registry.products)} products, "
+              f"{len(changes)} changes (fetched {age:.0f}s ago)")
+        return 0
+    for device_id, kind, fields in changes:
+        detail = ', '.join(f"{k}: {a!r} -> {b!r}" for k, (a, b) in fields.items())
+        print(f"{kind:>8} {device_id} {registry.get(device_id).get('name') or ''} {detail}".rstrip())
+    print(f"✅ {len(registry.devices)} devices, {len(registry.products)} products (fetched {age:.0f}s ago)")
+    for device_id, device in sorted(registry.devices.items(), key=lambda item: item[1].get('name') or ''):
+        state = 'online' if device.get('online') else 'offline'
+        print(f"  {device_id}  {device.get('name') or '-':<24} {device.get('category') or '-':<8} {state}")
+    return 0
@@ -6,22 +6,18 @@ import hmac
 import os
 import urllib.parse
 import csv
-from datetime import datetime, timezone, timedelta
-from dotenv import load_dotenv
 from typing import Dict, Any, Optional
 
-# Load environment variables from .env file
-load_dotenv()
-
 class TuyaCloudAPI:
-    def __init__(self):
+    def __init__(self, csv_file: Optional[str] = None, tz_hours: float = 8):
         self.client_id = os.getenv('TUYA_ACCESS_ID')
         self.secret = os.getenv('TUYA_ACCESS_SECRET')
         self.region = os.getenv('REGION', 'tuyaus').lower()
         self.base_url = os.getenv('TUYA_BASE_URL', self._get_base_url_from_region())
         self.access_token = None
         self.token_expire_time = 0
-        self.csv_file = os.getenv('CSV_FILE', 'tuya/device.csv')
+        self.csv_file = csv_file or os.getenv('CSV_FILE', 'tuya/device.csv')
+        self.tz_hours = tz_hours  # offset the CSV used before epoch-ms timestamps
         
         # Validate required environment variables
         if not self.client_id or not self.secret:
@@ -35,20 +31,36 @@ class TuyaCloudAPI:
         self._initialize_csv()
         
     def _initialize_csv(self):
-        """Initialize CSV file with headers if it doesn't exist"""
+        """Initialize CSV file with headers if it doesn't exist, or migrate an old-format one"""
         if not os.path.exists(self.csv_file):
             with open(self.csv_file, 'w', newline='') as file:
                 writer = csv.writer(file)
-                writer.writerow(['DateTime', 'Temperature'])
+                writer.writerow(['time', 'temperature'])
             print(f"Created new CSV file: {self.csv_file}")
+            return
+        with open(self.csv_file, newline='') as file:
+            header = next(csv.reader(file), [])
+        if header and header[0] != 'time':
+            # One-time rewrite of '%Y/%m/%d %H:%M' rows; pandas is only loaded for this
+            from series.timestamps import migrate_file
+            rows = migrate_file(self.csv_file, 'tuya', utc_offset=self.tz_hours)
+            print(f"✅ Migrated {rows} rows of {self.csv_file} to epoch-ms time")
     
-    def _append_to_csv(self, datetime_str: str, temperature: float):
+    def _registry(self, device_id: str):
+        """Cached fleet metadata (value scale, names); refreshed by `tuya-devices`, never here"""
+        try:
+            from tuya.registry import cached_registry
+        except ImportError:  # run from inside tuya/
+            from registry import cached_registry
+        return cached_registry(device_id)
+
+    def _append_to_csv(self, timestamp_ms: int, temperature: float):
         """Append data to CSV file"""
         try:
             with open(self.csv_file, 'a', newline='') as file:
                 writer = csv.writer(file)
-                writer.writerow([datetime_str, temperature])
-            print(f"✅ Data appended to CSV: {datetime_str}, {temperature}°C")
+                writer.writerow([timestamp_ms, temperature])
+            print(f"✅ Data appended to CSV: {timestamp_ms}, {temperature}°C")
         except Exception as e:
             print(f"❌ Error writing to CSV: {e}")
     
@@ -270,12 +282,13 @@ class TuyaCloudAPI:
             
             # Extract temperature data and append to CSV
             if result.get('success') and result.get('result'):
-                current_time = datetime.now(timezone(timedelta(hours=8))).strftime('%Y/%m/%d %H:%M')
+                current_time = int(time.time() * 1000)  # epoch ms, UTC
                 
                 # Look for temperature in the status data
                 for status_item in result['result']:
                     if status_item.get('code') == 'temp_current':  # Common temperature code
-                        temperature = status_item.get('value') / 10.0
+                        scale = self._registry(target_device_id).scale(target_device_id, 'temp_current')
+                        temperature = status_item.get('value') / 10 ** scale
                         self._append_to_csv(current_time, temperature)
                         break
                 else:
@@ -286,18 +299,19 @@ class TuyaCloudAPI:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Failed to get device status: {e}")
 
-# Usage example
-if __name__ == "__main__":
+def main(output: Optional[str] = None, timezone_hours: float = 8, device_id: Optional[str] = None):
+    """Poll one device and append its temperature to the CSV file"""
     try:
         print("Testing Tuya Cloud API...")
         
         # Try the main method first
         print("Trying main method with query parameters...")
-        tuya_api = TuyaCloudAPI()
-        device_id = os.getenv('TUYA_DEVICE_ID')
+        tuya_api = TuyaCloudAPI(csv_file=output, tz_hours=timezone_hours)
+        device_id = device_id or os.getenv('TUYA_DEVICE_ID')
         
         if not device_id:
             print("ERROR: TUYA_DEVICE_ID not found in environment variables")
+            return 1
         else:
             print(f"Device ID: {device_id}")
             
@@ -307,9 +321,11 @@ if __name__ == "__main__":
             if device_status.get('success'):
                 print("✅ SUCCESS: Device status retrieved and data appended to CSV!")
                 print(f"Status response: {json.dumps(device_status, indent=2)}")
+                return 0
             else:
                 print(f"❌ ERROR: {device_status.get('msg', 'Unknown error')}")
                 print(f"Error Code: {device_status.get('code', 'N/A')}")
+                return 1
                 
     except ValueError as e:
         print(f"Configuration error: {e}")
@@ -317,3 +333,12 @@ if __name__ == "__main__":
         print(f"An unexpected error occurred: {e}")
         import traceback
         traceback.print_exc()
+    return 1
+
+# Usage example
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    # Load environment variables from .env file
+    load_dotenv()
+    main()
\ No newline at end of file
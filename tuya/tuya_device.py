@@ -5,12 +5,8 @@ import hashlib
 import hmac
 import os
 import urllib.parse
-from dotenv import load_dotenv
 from typing import Dict, Any, Optional
 
-# Load environment variables from .env file
-load_dotenv()
-
 class TuyaCloudAPI:
     def __init__(self):
         self.client_id = os.getenv('TUYA_ACCESS_ID')
@@ -94,8 +90,8 @@ class TuyaCloudAPI:
         
         return signature
     
-    def get_access_token(self) -> str:
-        """Get access token from Tuya Cloud"""
+    def get_access_token(self, verbose: bool = True) -> str:
+        """Get access token from Tuya Cloud; verbose=False keeps the signature and token out of the output"""
         if self.access_token and time.time() < self.token_expire_time:
             return self.access_token
             
@@ -130,21 +126,24 @@ class TuyaCloudAPI:
         request_url = f"{full_url}?grant_type=1"
         
         try:
-            print(f"Getting access token from: {request_url}")
-            print(f"Timestamp: {timestamp}")
-            print(f"String to sign: {repr(sign_str)}")
-            print(f"Signature: {sign}")
+            if verbose:
+                print(f"Getting access token from: {request_url}")
+                print(f"Timestamp: {timestamp}")
+                print(f"String to sign: {repr(sign_str)}")
+                print(f"Signature: {sign}")
             
             response = requests.get(request_url, headers=headers, timeout=10)
             response.raise_for_status()
             result = response.json()
             
-            print(f"Token response: {json.dumps(result, indent=2)}")
+            if verbose:
+                print(f"Token response: {json.dumps(result, indent=2)}")
             
             if result['success']:
                 self.access_token = result['result']['access_token']
                 self.token_expire_time = time.time() + result['result']['expire_time'] - 300
-                print(f"Access token obtained successfully: {self.access_token[:20]}...")
+                if verbose:
+                    print(f"Access token obtained successfully: {self.access_token[:20]}...")
                 return self.access_token
             else:
                 raise Exception(f"Failed to get access token: {result.get('msg', 'Unknown error')}")
@@ -206,6 +205,30 @@ class TuyaCloudAPI:
         except json.JSONDecodeError as e:
             raise Exception(f"Failed to parse JSON response: {e}")
     
+    def request(self, endpoint: str, query_params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Signed GET of any OpenAPI endpoint with the cached token; prints nothing, tokens included"""
+        access_token = self.get_access_token(verbose=False)
+        timestamp = str(int(time.time() * 1000))
+        sign_map = self._string_to_sign(query_params=query_params, method="GET", path=endpoint)
+        sign = self._calc_sign(self.client_id, access_token, timestamp, "", sign_map["signUrl"], self.secret)
+
+        headers = {
+            'client_id': self.client_id,
+            'access_token': access_token,
+            'sign': sign,
+            't': timestamp,
+            'sign_method': 'HMAC-SHA256',
+            'Content-Type': 'application/json'
+        }
+
+        try:
+            response = requests.get(f"{self.base_url}{sign_map['url']}", headers=headers, timeout=10)
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Request to {endpoint} failed: {e}")
+        except json.JSONDecodeError as e:
+            raise Exception(f"Failed to parse JSON response: {e}")
+
     def get_device_status(self, device_id: Optional[str] = None) -> Dict[str, Any]:
         """
         GET {{url}}/v1.0/devices/{{device_id}}/status
@@ -284,6 +307,10 @@ class TuyaCloudAPIPost:
 
 # Usage example
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    # Load environment variables from .env file
+    load_dotenv()
     try:
         print("Testing Tuya Cloud API...")
         
@@ -6,12 +6,6 @@ import hmac
 import os
 import urllib.parse
 from datetime import datetime, timezone
-from dotenv import load_dotenv
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
-
-# Load environment variables from .env file
-load_dotenv()
 
 class TuyaTemperatureLogger:
     def __init__(self):
@@ -22,6 +16,9 @@ class TuyaTemperatureLogger:
         self.region = os.getenv('REGION', 'tuyaus').lower()
         self.base_url = self._get_base_url_from_region()
         self.access_token = None
+        registry = self._registry()
+        self.device_tags = registry.tags(self.device_id)
+        self.temp_scale = registry.scale(self.device_id, 'temp_current')
         
         # InfluxDB configuration
         self.influx_url = os.getenv('INFLUXDB_URL')
@@ -37,6 +34,8 @@ class TuyaTemperatureLogger:
             print("⚠️ InfluxDB not configured - data will not be exported")
             self.influx_client = None
         else:
+            # Imported here so callers that never write to InfluxDB don't pay for it
+            from influxdb_client import InfluxDBClient
             self.influx_client = InfluxDBClient(
                 url=self.influx_url,
                 token=self.influx_token,
@@ -53,6 +52,14 @@ class TuyaTemperatureLogger:
         }
         return region_urls.get(self.region, 'https://openapi.tuyaus.com')
     
+    def _registry(self):
+        """Cached fleet metadata (tags, value scale); refreshed by `tuya-devices`, never here"""
+        try:
+            from tuya.registry import cached_registry
+        except ImportError:  # run from inside tuya/
+            from registry import cached_registry
+        return cached_registry(self.device_id)
+
     def get_access_token(self):
         if self.access_token:
             return self.access_token
@@ -109,11 +116,14 @@ class TuyaTemperatureLogger:
         if result['success']:
             for status in result['result']:
                 if status['code'] == 'temp_current':
-                    return status['value'] / 10.0  # Convert to actual temperature
+                    return status['value'] / 10 ** self.temp_scale  # Convert to actual temperature
         
         return None
     
     def log_temperature_to_influxdb(self):
+        from influxdb_client import Point
+        from influxdb_client.client.write_api import SYNCHRONOUS
+
         temperature = self.get_temperature_data()
         
         if temperature is None:
@@ -137,6 +147,8 @@ class TuyaTemperatureLogger:
                 .tag("device_id", self.device_id)
                 .field("temperature", data[key]["tuya_temp"])
             )
+            for tag, value in self.device_tags.items():
+                point = point.tag(tag, value)
             
             self.influx_client.write_api(write_options=SYNCHRONOUS).write(
                 bucket=self.influx_bucket,
@@ -150,10 +162,19 @@ class TuyaTemperatureLogger:
         print("Complete. Return to the InfluxDB UI.")
         return True
 
-# Usage
-if __name__ == "__main__":
+def main():
+    """Poll the configured device and write its temperature to InfluxDB"""
     try:
         logger = TuyaTemperatureLogger()
-        logger.log_temperature_to_influxdb()
+        return 0 if logger.log_temperature_to_influxdb() else 1
     except Exception as e:
-        print(f"❌ Error: {e}")
\ No newline at end of file
+        print(f"❌ Error: {e}")
+        return 1
+
+# Usage
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    # Load environment variables from .env file
+    load_dotenv()
+    main()
\ No newline at end of file